@@ -7,9 +7,11 @@ from utils.models import BaseAdminModel
 @admin.register(Customer)
 class CustomerAdmin(BaseAdminModel):
     model = Customer
-    list_display = ("full_name", "points")
-    search_fields = ("full_name",)
-    list_filter = ("full_name",)
+    list_display = ("full_name", "phone_number", "points")
+    # Matched through the normalized columns, see get_search_results
+    search_fields = ("full_name", "phone_number")
+    # Points are accrued from orders, see orders.models.PointsEvent
+    readonly_fields = (*BaseAdminModel.readonly_fields, "points")
 
     fieldsets = (
         (
@@ -18,3 +20,7 @@ class CustomerAdmin(BaseAdminModel):
         ),
         ("Notes", {"fields": ("notes",)}),
     )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Also serves the autocomplete widgets of the other admins
+        return queryset.search(search_term), False
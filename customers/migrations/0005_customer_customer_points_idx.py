@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_customer_customer_live_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(models.OrderBy(models.F('points'), descending=True), models.F('id'), condition=models.Q(('deleted_at__isnull', True)), name='customer_points_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:35
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Copies of customers.search as of this migration, so later changes to the
+# normalization do not change what the backfill does
+
+DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+LETTER_VARIANTS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ی": "ي",
+        "ة": "ه",
+    }
+)
+
+ARABIC_MARKS = re.compile("[\u064b-\u065f\u0670\u0640]")
+
+
+def normalize_name(value):
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).translate(DIGITS)
+    value = ARABIC_MARKS.sub("", value.translate(LETTER_VARIANTS))
+    return " ".join(value.casefold().split())
+
+
+def normalize_phone(value):
+    if not value:
+        return ""
+    return re.sub(r"\D", "", value.translate(DIGITS))
+
+
+def backfill_search_columns(apps, schema_editor):
+    Customer = apps.get_model("customers", "Customer")
+    customers = Customer.objects.only("full_name", "phone_number").order_by("pk")
+    batch = []
+    for customer in customers.iterator(chunk_size=2000):
+        customer.search_name = normalize_name(customer.full_name)
+        customer.search_phone = normalize_phone(customer.phone_number)
+        batch.append(customer)
+        if len(batch) == 2000:
+            Customer.objects.bulk_update(batch, ["search_name", "search_phone"])
+            batch = []
+    Customer.objects.bulk_update(batch, ["search_name", "search_phone"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_customer_customer_points_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='customer',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='search_phone',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_name', name='gin_trgm_ops'), condition=models.Q(('deleted_at__isnull', True)), name='customer_search_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_phone', name='gin_trgm_ops'), condition=models.Q(('deleted_at__isnull', True)), name='customer_search_phone_idx'),
+        ),
+    ]
@@ -1,6 +1,73 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models import F, Value
 from django_better_admin_arrayfield.models.fields import ArrayField
-from utils.models import BaseModel
+
+from customers.search import normalize_name, normalize_phone, search_customers
+from utils.models import LIVE_ROWS, BaseModel, SoftDeleteManager, SoftDeleteQuerySet
+
+
+# Columns kept in their search form, see customers.search
+SEARCH_COLUMNS = {
+    "full_name": ("search_name", normalize_name),
+    "phone_number": ("search_phone", normalize_phone),
+}
+
+
+# Rows per UPDATE when search columns are rewritten after an update() by
+# expression
+SEARCH_BATCH_SIZE = 500
+
+
+class CustomerQuerySet(SoftDeleteQuerySet):
+    def search(self, term):
+        return search_customers(self, term)
+
+    def update(self, **kwargs):
+        expressions = []
+        for field, (column, normalize) in SEARCH_COLUMNS.items():
+            if field not in kwargs:
+                continue
+            value = kwargs[field]
+            if isinstance(value, Value):
+                value = value.value
+            if value is None or isinstance(value, str):
+                kwargs[column] = normalize(value)
+            else:
+                expressions.append(field)
+        if not expressions:
+            return super().update(**kwargs)
+
+        # What an expression writes is only known once the database has
+        # evaluated it, so the search columns of the updated rows are
+        # normalized from the values read back
+        with transaction.atomic(using=self.db):
+            pks = list(
+                self.order_by().select_for_update(of=("self",)).values_list("pk", flat=True)
+            )
+            rows = super().update(**kwargs)
+            customers = [
+                self.model(pk=pk, **dict(zip(SEARCH_COLUMNS, values)))
+                for pk, *values in self.model._base_manager.using(self.db)
+                .filter(pk__in=pks)
+                .values_list("pk", *SEARCH_COLUMNS)
+            ]
+            for customer in customers:
+                customer.set_search_columns()
+            self.model._base_manager.using(self.db).bulk_update(
+                customers,
+                [column for column, _ in SEARCH_COLUMNS.values()],
+                batch_size=SEARCH_BATCH_SIZE,
+            )
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_search_columns()
+        return super().bulk_create(objs, *args, **kwargs)
 
 
 # Create your models here.
@@ -10,7 +77,54 @@ class Customer(BaseModel):
     address = models.CharField(max_length=255, null=True, blank=True)
     email = models.EmailField(max_length=255, null=True, blank=True)
     notes = ArrayField(models.CharField(max_length=255))
+    # Earned from orders, see orders.models.PointsEvent
     points = models.IntegerField(default=0)
+    # Normalized full_name and phone_number digits the admin search runs on
+    search_name = models.CharField(max_length=255, default="", editable=False)
+    search_phone = models.CharField(max_length=255, default="", editable=False)
+
+    objects = SoftDeleteManager.from_queryset(CustomerQuerySet)()
+    all_objects = CustomerQuerySet.as_manager()
+
+    counter_fields = ("points",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=LIVE_ROWS, name="customer_live_id_idx"),
+            # Points leaderboard
+            models.Index(
+                F("points").desc(), "id", condition=LIVE_ROWS, name="customer_points_idx"
+            ),
+            # Substring search, needs the pg_trgm extension
+            GinIndex(
+                OpClass("search_name", name="gin_trgm_ops"),
+                condition=LIVE_ROWS,
+                name="customer_search_name_idx",
+            ),
+            GinIndex(
+                OpClass("search_phone", name="gin_trgm_ops"),
+                condition=LIVE_ROWS,
+                name="customer_search_phone_idx",
+            ),
+        ]
+
+    def set_search_columns(self):
+        for field, (column, normalize) in SEARCH_COLUMNS.items():
+            setattr(self, column, normalize(getattr(self, field)))
+
+    def save(self, *args, **kwargs):
+        self.set_search_columns()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = [
+                *update_fields,
+                *(
+                    column
+                    for field, (column, _) in SEARCH_COLUMNS.items()
+                    if field in update_fields
+                ),
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.full_name} - {self.phone_number}"
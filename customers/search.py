@@ -0,0 +1,72 @@
+import re
+import unicodedata
+
+from django.db.models import Q
+
+# Arabic-Indic and Persian digits, as typed on Arabic keyboards
+DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+
+# Spelling variants of the same letter that customers are written with
+# interchangeably: hamza and madda alefs, alef maksura, Persian yeh and
+# teh marbuta
+LETTER_VARIANTS = str.maketrans(
+    {
+        "أ": "ا",
+        "إ": "ا",
+        "آ": "ا",
+        "ٱ": "ا",
+        "ى": "ي",
+        "ی": "ي",
+        "ة": "ه",
+    }
+)
+
+# Harakat, superscript alef and tatweel, which never change the name
+ARABIC_MARKS = re.compile("[\u064b-\u065f\u0670\u0640]")
+
+# Terms shorter than a trigram cannot be looked up in the trigram indexes,
+# they are only matched at the start of a word
+TRIGRAM_LENGTH = 3
+
+
+def normalize_name(value):
+    """
+    Search form of a name: case folded, Arabic letter variants unified,
+    diacritics dropped and whitespace collapsed
+    """
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKC", value).translate(DIGITS)
+    value = ARABIC_MARKS.sub("", value.translate(LETTER_VARIANTS))
+    return " ".join(value.casefold().split())
+
+
+def normalize_phone(value):
+    """Search form of a phone number: its digits only"""
+    if not value:
+        return ""
+    return re.sub(r"\D", "", value.translate(DIGITS))
+
+
+def _match(column, term):
+    if len(term) >= TRIGRAM_LENGTH:
+        return Q(**{f"{column}__contains": term})
+    return Q(**{f"{column}__startswith": term}) | Q(**{f"{column}__contains": f" {term}"})
+
+
+def search_customers(queryset, term):
+    """
+    Filter customers by a search term against the normalized columns, which
+    are covered by trigram indexes. Every word of the term must appear in the
+    name, and a term that is a phone number also matches the phone digits
+    """
+    words = normalize_name(term).split()
+    if not words:
+        return queryset
+    condition = Q()
+    for word in words:
+        condition &= _match("search_name", word)
+    phone = normalize_phone(term)
+    if phone and not re.search(r"[^\d\s()+\-.]", term.translate(DIGITS)):
+        condition |= _match("search_phone", phone)
+    return queryset.filter(condition)
@@ -1,3 +1,77 @@
-from django.test import TestCase
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.urls import reverse
 
-# Create your tests here.
+from customers.models import Customer
+from customers.search import normalize_name, normalize_phone
+from utils.testing import AdminTestCase, create_basket, create_customer, create_orders
+
+
+class CustomerSearchTests(AdminTestCase):
+    """Customers are searched through their normalized name and phone columns"""
+
+    def setUp(self):
+        super().setUp()
+        self.ahmad = create_customer("أحمد  علي", phone_number="+961 ٧١ 234 567")
+        self.mona = create_customer("Mona Yehia", phone_number="03-111222")
+
+    def search(self, term):
+        return list(Customer.objects.search(term))
+
+    def search_columns(self, customer):
+        return Customer.objects.values_list("search_name", "search_phone").get(
+            pk=customer.pk
+        )
+
+    def test_normalize(self):
+        self.assertEqual(normalize_name("  إيمان   مُحمّدى "), "ايمان محمدي")
+        self.assertEqual(normalize_phone("+٩٦١ (۰۳) 111-222"), "96103111222")
+        self.assertEqual((normalize_name(None), normalize_phone("")), ("", ""))
+
+    def test_arabic_variants(self):
+        self.assertEqual(self.search("احمد"), [self.ahmad])
+        self.assertEqual(self.search("علی أحمد"), [self.ahmad])
+
+    def test_phone_digits(self):
+        self.assertEqual(self.search("71234"), [self.ahmad])
+        self.assertEqual(self.search("03 111"), [self.mona])
+
+    def test_arabic_indic_digits(self):
+        self.assertEqual(self.search("٧١٢٣٤"), [self.ahmad])
+        self.assertEqual(self.search("۰۳ ۱۱۱"), [self.mona])
+
+    def test_short_terms_match_word_starts(self):
+        self.assertEqual(self.search("mo"), [self.mona])
+        self.assertEqual(self.search("y"), [self.mona])
+        self.assertEqual(self.search("على"), [self.ahmad])
+        self.assertEqual(self.search("on"), [])
+
+    def test_columns_follow_updates(self):
+        Customer.objects.filter(pk=self.mona.pk).update(full_name="Mona Haddad")
+        self.assertEqual(self.search("haddad"), [self.mona])
+        Customer.objects.bulk_create([Customer(full_name="Sami Haddad", notes=[])])
+        self.assertEqual(len(self.search("HADDAD")), 2)
+
+    def test_update_with_value(self):
+        Customer.objects.filter(pk=self.mona.pk).update(phone_number=Value("٠٣-٩٩٩"))
+        self.assertEqual(self.search_columns(self.mona), ("mona yehia", "03999"))
+
+    def test_update_with_expressions(self):
+        Customer.objects.filter(full_name="Mona Yehia").update(
+            full_name=Concat(F("full_name"), Value(" HADDAD")),
+            phone_number=F("full_name"),
+        )
+        self.assertEqual(
+            self.search_columns(self.mona), ("mona yehia haddad", "")
+        )
+        self.assertEqual(self.search("haddad"), [self.mona])
+        self.assertEqual(self.search_columns(self.ahmad), ("احمد علي", "96171234567"))
+
+    def test_admin_search(self):
+        url = reverse("admin:customers_customer_changelist")
+        response = self.client.get(url, {"q": "احمد"})
+        self.assertEqual(list(response.context["cl"].result_list), [self.ahmad])
+        [order] = create_orders(1, self.mona, create_basket())
+        url = reverse("admin:orders_order_changelist")
+        response = self.client.get(url, {"q": "yehia"})
+        self.assertEqual(list(response.context["cl"].result_list), [order])
@@ -1,5 +1,6 @@
 from io import BytesIO
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 from django.http import HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
@@ -9,7 +10,7 @@ from xhtml2pdf import pisa
 from io import BytesIO
 import datetime
 
-from expenses.models import Expense, ExpenseCategory, Capital
+from expenses.models import Expense, ExpenseCategory, Capital, CapitalEntry
 from utils.models import BaseAdminModel
 
 
@@ -120,3 +121,36 @@ class CapitalAdmin(BaseAdminModel):
     def response_action(self, request, queryset):
         # Redirect to the change view of the single Capital instance
         return redirect(reverse("admin:expenses_capital_change", args=(1,)))
+
+    def formfield_for_dbfield(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_dbfield(db_field, request, **kwargs)
+        if db_field.name == "amount":
+            # Post back the balance the form showed, see save_model
+            formfield.show_hidden_initial = True
+        return formfield
+
+    def save_model(self, request, obj, form, change):
+        # The edit moves the balance by its difference from what the form
+        # showed, movements recorded since the form loaded are kept
+        field = form.fields["amount"]
+        try:
+            seen_amount = field.to_python(form.data.get(form.add_initial_prefix("amount")))
+        except ValidationError:
+            seen_amount = None
+        obj.save(seen_amount=seen_amount)
+
+
+@admin.register(CapitalEntry)
+class CapitalEntryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "reason", "source_model", "source_id", "delta")
+    list_filter = ("reason", "source_model")
+    list_per_page = 25
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
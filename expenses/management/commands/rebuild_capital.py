@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from expenses.models import Capital
+
+
+class Command(BaseCommand):
+    help = "Replay the capital ledger and store the result as the capital balance"
+
+    def handle(self, *args, **options):
+        old_amount = Capital.load().amount
+        new_amount = Capital.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f"Capital rebuilt: {old_amount}$ -> {new_amount}$")
+        )
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.13 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+def record_opening_balance(apps, schema_editor):
+    # Seed the ledger with the current balance so a replay reproduces it
+    Capital = apps.get_model("expenses", "Capital")
+    CapitalEntry = apps.get_model("expenses", "CapitalEntry")
+    capital = Capital.objects.filter(pk=1).first()
+    if capital and capital.amount:
+        CapitalEntry.objects.create(delta=capital.amount, reason="opening_balance")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0003_expensecategory_alter_expense_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CapitalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_model', models.CharField(blank=True, max_length=100, null=True)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('delta', models.FloatField()),
+                ('reason', models.CharField(choices=[('opening_balance', 'Opening Balance'), ('adjustment', 'Adjustment'), ('save', 'Save'), ('delete', 'Delete')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'capital entries',
+                'indexes': [models.Index(fields=['source_model', 'source_id'], name='expenses_ca_source__b7fef5_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.13 on 2026-10-17 16:16
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+import django.db.models.deletion
+
+
+def backfill(source, rollup, dimensions, metrics):
+    def run(apps, schema_editor):
+        Source = apps.get_model(*source)
+        Rollup = apps.get_model(*rollup)
+        rows = (
+            Source.objects.filter(deleted_at__isnull=True)
+            .annotate(day=TruncDate("created_at"))
+            .values("day", *dimensions)
+            .annotate(
+                row_count=Count("pk"),
+                **{
+                    metric: Coalesce(Sum(metric), 0, output_field=output_field)
+                    for metric, output_field in metrics.items()
+                },
+            )
+            .order_by()
+        )
+        Rollup.objects.bulk_create((Rollup(**row) for row in rows), batch_size=1000)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_capitalentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('row_count', models.IntegerField(default=0)),
+                ('amount', models.FloatField(default=0)),
+                ('category', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='expenses.expensecategory')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='expensedailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'category'), name='unique_expense_daily_rollup'),
+        ),
+        migrations.RunPython(
+            backfill(
+                ("expenses", "Expense"),
+                ("expenses", "ExpenseDailyRollup"),
+                ("category_id",),
+                {"amount": models.FloatField()},
+            ),
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_expensedailyrollup_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at'], name='expense_live_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expense_expense_live_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['category', 'created_at'], name='expense_category_created_idx'),
+        ),
+    ]
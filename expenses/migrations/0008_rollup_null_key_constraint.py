@@ -0,0 +1,47 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:48
+
+from django.db import migrations, models
+from django.db.models import Count
+import utils.models
+
+
+def merge_duplicate_rows(Rollup, keys):
+    """Fold rollup rows the old constraint let through into one per key"""
+    metrics = [
+        field.name
+        for field in Rollup._meta.concrete_fields
+        if not field.primary_key and field.name not in keys
+    ]
+    duplicates = (
+        Rollup.objects.values(*keys).annotate(rows=Count("pk")).filter(rows__gt=1)
+    )
+    for key in duplicates:
+        rows = list(Rollup.objects.filter(**{k: key[k] for k in keys}).order_by("pk"))
+        kept = rows[0]
+        for metric in metrics:
+            setattr(kept, metric, sum(getattr(row, metric) for row in rows))
+        kept.save()
+        Rollup.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    merge_duplicate_rows(apps.get_model("expenses", "ExpenseDailyRollup"), ["day", "category"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0007_expense_expense_category_created_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expensedailyrollup',
+            name='unique_expense_daily_rollup',
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='expensedailyrollup',
+            constraint=models.UniqueConstraint(models.F('day'), utils.models.NullKey('category'), name='unique_expense_daily_rollup'),
+        ),
+    ]
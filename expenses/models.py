@@ -1,6 +1,15 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Sum
 
-from utils.models import BaseModel
+from utils.dashboard import invalidate_dashboard
+from utils.models import (
+    LIVE_ROWS,
+    AccountedQuerySet,
+    BaseModel,
+    BaseRollup,
+    NullKey,
+    SoftDeleteManager,
+)
 
 
 class CapitalManager(models.Manager):
@@ -12,13 +21,110 @@ class CapitalManager(models.Manager):
         return Capital.objects.get(pk=1)
 
 
+class CapitalEntryReason(models.TextChoices):
+    OPENING_BALANCE = "opening_balance"
+    ADJUSTMENT = "adjustment"
+    SAVE = "save"
+    DELETE = "delete"
+
+
+class CapitalEntry(models.Model):
+    """
+    Immutable ledger row, one per money-moving event.
+    Capital.amount is the rolled-up sum of every entry's delta.
+    """
+
+    source_model = models.CharField(max_length=100, null=True, blank=True)
+    source_id = models.BigIntegerField(null=True, blank=True)
+    delta = models.FloatField()
+    reason = models.CharField(max_length=20, choices=CapitalEntryReason.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "capital entries"
+        indexes = [models.Index(fields=["source_model", "source_id"])]
+
+    def __str__(self):
+        return f"{self.reason} {self.delta:+}$"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Capital entries are immutable")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Capital entries are immutable")
+
+
 # Create your models here.
 class Capital(BaseModel):
     amount = models.FloatField()
 
-    def save(self, *args, **kwargs):
+    # Only ever moved by adjust(), see save()
+    counter_fields = ("amount",)
+
+    def save(self, *args, seen_amount=None, **kwargs):
+        """
+        The balance is never written directly. An edited amount is applied as
+        an ADJUSTMENT of its difference from seen_amount, the balance the edit
+        was made against (by default the loaded one), so movements recorded
+        since then are kept
+        """
         self.pk = 1
-        super(Capital, self).save(*args, **kwargs)
+        original = self.get_original()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = [
+                name for name in kwargs["update_fields"] if name != "amount"
+            ]
+
+        with transaction.atomic():
+            if original is None:
+                delta, self.amount = self.amount, 0
+                super(Capital, self).save(*args, **kwargs)
+            else:
+                if seen_amount is None:
+                    seen_amount = original.amount
+                delta = self.amount - seen_amount
+                # Instances built by hand update the existing row
+                self._state.adding = False
+                self.created_at = self.created_at or original.created_at
+                super(Capital, self).save(*args, **kwargs)
+            Capital.adjust(delta, reason=CapitalEntryReason.ADJUSTMENT)
+        self.refresh_from_db(fields=["amount"])
+
+    @classmethod
+    def adjust(cls, delta, source=None, reason=CapitalEntryReason.SAVE):
+        """
+        Record a ledger entry and apply it to the balance with a single
+        atomic increment, so concurrent saves never lose an update.
+        source is the row behind the movement, or its model for bulk changes
+        """
+        if not delta:
+            return None
+
+        with transaction.atomic():
+            entry = CapitalEntry.objects.create(
+                source_model=source._meta.label_lower if source is not None else None,
+                source_id=source.pk if isinstance(source, models.Model) else None,
+                delta=delta,
+                reason=reason,
+            )
+            if not cls.objects.filter(pk=1).update(amount=F("amount") + delta):
+                # First movement ever, create the balance row then apply
+                cls.load()
+                cls.objects.filter(pk=1).update(amount=F("amount") + delta)
+            invalidate_dashboard()
+        return entry
+
+    @classmethod
+    def rebuild(cls):
+        """Replay the whole ledger and store the result as the balance"""
+        with transaction.atomic():
+            total = CapitalEntry.objects.aggregate(r=Sum("delta")).get("r") or 0
+            cls.load()
+            cls.objects.filter(pk=1).update(amount=total)
+            invalidate_dashboard()
+        return total
 
     @classmethod
     def load(cls):
@@ -42,7 +148,21 @@ class ExpenseCategory(BaseModel):
         return self.name
 
 
+class ExpenseQuerySet(AccountedQuerySet):
+    capital_fields = ("amount",)
+
+    @staticmethod
+    def capital_expression(columns):
+        return -columns["amount"]
+
+    def get_rollup(self):
+        return ExpenseDailyRollup
+
+
 class Expense(BaseModel):
+    objects = SoftDeleteManager.from_queryset(ExpenseQuerySet)()
+    all_objects = ExpenseQuerySet.as_manager()
+
     name = models.CharField(max_length=100)
     amount = models.FloatField()
     date = models.DateField(null=True, blank=True)
@@ -52,6 +172,18 @@ class Expense(BaseModel):
     )
     description = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"], condition=LIVE_ROWS, name="expense_live_created_idx"
+            ),
+            models.Index(
+                fields=["category", "created_at"],
+                condition=LIVE_ROWS,
+                name="expense_category_created_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -61,28 +193,47 @@ class Expense(BaseModel):
         if from_delete:
             return super().save(*args, **kwargs)
 
-        if self.pk:
-            # Instance is being updated
-            old_amount = Expense.objects.get(pk=self.pk).amount
-        else:
-            # Instance is being created
-            old_amount = 0
-
-        new_amount = self.amount
-        amount_difference = old_amount - new_amount
-
-        # You can now use amount_difference as needed
-        # For example, logging the difference
-        if amount_difference != 0:
-            capital = Capital.objects.get(pk=1)
-            capital.amount += amount_difference
-            capital.save()
+        old_obj = self.get_original()
+        amount_difference = self.capital_contribution()
+        if old_obj:
+            amount_difference -= old_obj.capital_contribution()
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Capital.adjust(amount_difference, source=self)
+            ExpenseDailyRollup.record(old_obj, self)
+            invalidate_dashboard()
 
     def delete(self):
-        capital = Capital.objects.get(pk=1)
-        capital.amount += self.amount
-        capital.save()
+        with transaction.atomic():
+            Capital.adjust(
+                -self.capital_contribution(), source=self, reason=CapitalEntryReason.DELETE
+            )
+            ExpenseDailyRollup.record(self, None)
+            invalidate_dashboard()
+            return super().delete()
+
+    def capital_contribution(self):
+        return -self.amount
 
-        return super().delete()
+
+class ExpenseDailyRollup(BaseRollup):
+    source_model = Expense
+    dimensions = ("category_id",)
+    metrics = ("amount",)
+
+    category = models.ForeignKey(
+        ExpenseCategory,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+    )
+    amount = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "day", NullKey("category"), name="unique_expense_daily_rollup"
+            )
+        ]
@@ -1,3 +1,83 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from expenses.models import (
+    Capital,
+    CapitalEntry,
+    CapitalEntryReason,
+    ExpenseDailyRollup,
+)
+
+
+class CapitalLedgerTests(TestCase):
+    """The balance only moves through ledger entries"""
+
+    def setUp(self):
+        Capital.load()
+
+    def balance(self):
+        return Capital.objects.get().amount
+
+    def test_adjust_records_entry(self):
+        entry = Capital.adjust(40)
+        Capital.adjust(-15)
+        self.assertEqual(self.balance(), 25)
+        self.assertEqual(entry.reason, CapitalEntryReason.SAVE)
+        self.assertEqual(CapitalEntry.objects.count(), 2)
+        self.assertIsNone(Capital.adjust(0))
+
+    def test_stale_save_keeps_movements(self):
+        capital = Capital.objects.get()
+        Capital.adjust(50)
+        capital.amount += 10
+        capital.save()
+        self.assertEqual(self.balance(), 60)
+        self.assertEqual(capital.amount, 60)
+        adjustment = CapitalEntry.objects.get(reason=CapitalEntryReason.ADJUSTMENT)
+        self.assertEqual(adjustment.delta, 10)
+
+    def test_save_against_seen_amount(self):
+        Capital.adjust(50)
+        capital = Capital.objects.get()
+        capital.amount = 70
+        capital.save(seen_amount=0)
+        self.assertEqual(self.balance(), 120)
+
+    def test_rebuild_replays_ledger(self):
+        Capital.adjust(30)
+        Capital.adjust(12)
+        Capital.objects.update(amount=0)
+        self.assertEqual(Capital.rebuild(), 42)
+        self.assertEqual(self.balance(), 42)
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class RollupConcurrencyTests(TransactionTestCase):
+    """Concurrent first writes of a day share one rollup row, NULL keys included"""
+
+    def test_concurrent_null_key_writes(self):
+        day = timezone.now().date()
+        barrier = threading.Barrier(4)
+        errors = []
+
+        def write():
+            try:
+                barrier.wait()
+                ExpenseDailyRollup.apply_changes({(day, None): (1, {"amount": 5})})
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        rollup = ExpenseDailyRollup.objects.get(day=day, category=None)
+        self.assertEqual((rollup.row_count, rollup.amount), (4, 20))
@@ -3,8 +3,16 @@ from django.urls import path
 from django.contrib.auth.decorators import user_passes_test
 
 from finders import views
-from orders.views import RangeSummary, export_range_summary, print_order_baskets_pdf, print_orders_pdf
+from orders.views import (
+    RangeSummary,
+    ReportJobStatusView,
+    download_report_job,
+    export_range_summary,
+    print_order_baskets_pdf,
+    print_orders_pdf,
+)
 from providers.views import ShippingProviderAnalyze, export_shipping_provider_analyze
+from utils.autocomplete import CachedAutocompleteJsonView
 
 
 # Define superuser check decorator
@@ -46,6 +54,16 @@ class CustomAdminSite(admin.AdminSite):
                 superuser_required(export_shipping_provider_analyze),
                 name="export_shipping_provider_analyze",
             ),
+            path(
+                "leaderboard/",
+                superuser_required(views.Leaderboard.as_view(admin=self)),
+                name="leaderboard",
+            ),
+            path(
+                "request-profile/",
+                superuser_required(views.RequestProfile.as_view(admin=self)),
+                name="request_profile",
+            ),
             path("generate_pdf/", views.generate_pdf, name="generate_pdf"),
             path(
                 "print-order-baskets-pdf/",
@@ -57,9 +75,22 @@ class CustomAdminSite(admin.AdminSite):
                 superuser_required(print_orders_pdf),
                 name="print_orders_pdf",
             ),
+            path(
+                "report-jobs/<int:job_id>/",
+                superuser_required(ReportJobStatusView.as_view(admin=self)),
+                name="report_job_status",
+            ),
+            path(
+                "report-jobs/<int:job_id>/download/",
+                superuser_required(download_report_job),
+                name="download_report_job",
+            ),
         ]
         return custom_urls + admin_urls  # custom urls must be at the beginning
 
+    def autocomplete_view(self, request):
+        return CachedAutocompleteJsonView.as_view(admin_site=self)(request)
+
     def get(self, request):
         request.current_app == self.name
         return super().get(request)
@@ -91,6 +122,18 @@ class CustomAdminSite(admin.AdminSite):
                             "admin_url": "/shipping-provider-analyze",
                             "view_only": True,
                         },
+                        {
+                            "name": "Leaderboard",
+                            "object_name": "leaderboard",
+                            "admin_url": "/leaderboard",
+                            "view_only": True,
+                        },
+                        {
+                            "name": "Request Profile",
+                            "object_name": "request_profile",
+                            "admin_url": "/request-profile",
+                            "view_only": True,
+                        },
                     ],
                 }
             ]
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -43,7 +45,6 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django_better_admin_arrayfield",
-    "django_admin_inline_paginator_plus",
     "rest_framework",
     "customers",
     "orders",
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "utils.profiling.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,7 +88,63 @@ WSGI_APPLICATION = "finders.wsgi.app"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {"default": dj_database_url.config(default=os.environ.get("DATABASE_URL"))}
+# Connections are kept open for DB_CONN_MAX_AGE seconds and reused by later
+# requests ("none" keeps them forever, 0 closes them after every request),
+# after checking they still work when DB_CONN_HEALTH_CHECKS is on.
+# DB_POOL_MODE=pgbouncer is for a DATABASE_URL pointing at PgBouncer (or any
+# pooler in transaction mode), which cannot keep server-side cursors open
+DB_CONN_MAX_AGE = os.environ.get("DB_CONN_MAX_AGE", "60")
+DB_CONN_HEALTH_CHECKS = os.environ.get("DB_CONN_HEALTH_CHECKS", "1") == "1"
+DB_CONNECT_TIMEOUT = int(os.environ.get("DB_CONNECT_TIMEOUT", 5))
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "")
+
+DATABASES = {
+    "default": dj_database_url.config(
+        default=os.environ.get("DATABASE_URL"),
+        conn_max_age=None if DB_CONN_MAX_AGE == "none" else int(DB_CONN_MAX_AGE),
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+}
+
+if DATABASES["default"].get("ENGINE") == "django.db.backends.postgresql":
+    # Same backend, timing connection setup for the request profiles
+    DATABASES["default"]["ENGINE"] = "utils.postgresql"
+    DATABASES["default"].setdefault("OPTIONS", {})
+    DATABASES["default"]["OPTIONS"].setdefault("connect_timeout", DB_CONNECT_TIMEOUT)
+
+if DB_POOL_MODE == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+elif DB_POOL_MODE:
+    raise ImproperlyConfigured(f"Unknown DB_POOL_MODE {DB_POOL_MODE!r}")
+
+# Open the database connection when the WSGI app starts instead of on the first request
+DB_WARM_UP = os.environ.get("DB_WARM_UP", "") == "1"
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "finders"),
+    }
+}
+
+# Upper bound, in seconds, on how stale the Overview metrics can be
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("DASHBOARD_CACHE_TIMEOUT", 60))
+
+# Upper bound, in seconds, on how stale admin autocomplete results can be
+# after bulk changes, saved rows drop the cached results of their model
+AUTOCOMPLETE_CACHE_TIMEOUT = int(os.environ.get("AUTOCOMPLETE_CACHE_TIMEOUT", 30))
+
+
+# Requests slower than SLOW_REQUEST_MS milliseconds are logged, the last
+# REQUEST_PROFILE_WINDOW samples of each URL are kept for the profile page
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 1000))
+REQUEST_PROFILE_WINDOW = int(os.environ.get("REQUEST_PROFILE_WINDOW", 200))
 
 
 # Password validation
@@ -133,3 +191,25 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles_build", "static")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 LIST_PER_PAGE = 25
+
+# Load PDF fonts and styles when the WSGI app starts instead of on the first report
+PDF_WARM_UP = os.environ.get("PDF_WARM_UP", "") == "1"
+
+# Orders PDFs above PDF_PARALLEL_THRESHOLD orders are rendered in chunks of
+# PDF_CHUNK_SIZE orders by PDF_WORKERS processes
+PDF_PARALLEL_THRESHOLD = int(os.environ.get("PDF_PARALLEL_THRESHOLD", 500))
+PDF_CHUNK_SIZE = int(os.environ.get("PDF_CHUNK_SIZE", 200))
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+
+# Background PDF report jobs
+REPORT_JOBS_DIR = os.environ.get(
+    "REPORT_JOBS_DIR", os.path.join(tempfile.gettempdir(), "finders-reports")
+)
+# Reports rendered at the same time, across every worker
+REPORT_JOB_CONCURRENCY = int(os.environ.get("REPORT_JOB_CONCURRENCY", 2))
+# Seconds after which a running job is considered dead and marked as failed
+REPORT_JOB_TIMEOUT = int(os.environ.get("REPORT_JOB_TIMEOUT", 600))
+# Selections larger than this are printed through a background job
+REPORT_JOB_SYNC_LIMIT = int(os.environ.get("REPORT_JOB_SYNC_LIMIT", 100))
+# Seconds an admin selection stays printable through its token
+REPORT_SELECTION_TTL = int(os.environ.get("REPORT_SELECTION_TTL", 3600))
@@ -1,13 +1,20 @@
 from datetime import datetime
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django import views
 from django.http import FileResponse, HttpResponse
+from django.db.models import Sum
 import io
 
 from reportlab.pdfgen import canvas
 
+from customers.models import Customer
 from orders.models import Order
-from expenses.models import Capital
+from orders.pdf import get_arabic_text_cache_stats
+from providers.models import ShippingProvider
+from expenses.models import Capital, ExpenseDailyRollup
+from utils.connections import connection_settings
+from utils.dashboard import get_dashboard_cache_stats, get_dashboard_metrics
+from utils.profiling import history
 
 
 def generate_pdf(request):
@@ -35,19 +42,65 @@ def generate_pdf(request):
     return HttpResponse("Not the correct method")
 
 
+def get_overview_metrics():
+    return {
+        "capital": str(Capital.load()),
+        "total_money_received_from_orders": (
+            f"{Order.objects.get_all_received_money_from_orders()}$"
+        ),
+        "total_missing_money": (
+            f"{Order.objects.get_missing_money_from_all_providers()}$"
+        ),
+        "total_expenses": (
+            f"{ExpenseDailyRollup.objects.aggregate(r=Sum('amount')).get('r')}$"
+        ),
+    }
+
+
 class Overview(views.generic.ListView):
     admin = {}
 
     def get(self, request):
         ctx = self.admin.each_context(request)
         
-        ctx["capital"] = Capital.load()
-        
-        ctx["total_money_received_from_orders"] = (
-            f"{Order.objects.get_all_received_money_from_orders()}$"
-        )
-        ctx["total_missing_money"] = (
-            f"{Order.objects.get_missing_money_from_all_providers()}$"
-        )
+        ctx.update(get_dashboard_metrics(get_overview_metrics))
+        ctx["cache_stats"] = get_dashboard_cache_stats()
         ctx["email"] = "Email"
-        return render(request, "overview.html", ctx)
\ No newline at end of file
+        return render(request, "overview.html", ctx)
+
+class Leaderboard(views.generic.ListView):
+    """
+    Customers and shipping providers with the most points, read from the
+    points indexes
+    """
+    admin = {}
+
+    def get(self, request):
+        ctx = self.admin.each_context(request)
+        try:
+            top = min(max(int(request.GET.get("top", 10)), 1), 100)
+        except ValueError:
+            top = 10
+        ctx["top"] = top
+        ctx["customers"] = Customer.objects.order_by("-points", "id")[:top]
+        ctx["shipping_providers"] = ShippingProvider.objects.order_by("-points", "pk")[:top]
+        return render(request, "leaderboard.html", ctx)
+
+
+class RequestProfile(views.generic.ListView):
+    """
+    Latency and query counts of the recent requests served by this process
+    """
+    admin = {}
+
+    def get(self, request):
+        ctx = self.admin.each_context(request)
+        ctx["profiles"] = history.summary()
+        ctx["window"] = history.window
+        ctx["connection"] = connection_settings()
+        ctx["arabic_text_cache"] = get_arabic_text_cache_stats()
+        return render(request, "request-profile.html", ctx)
+
+    def post(self, request):
+        history.clear()
+        return redirect("admin:request_profile")
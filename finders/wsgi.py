@@ -15,4 +15,16 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "finders.settings")
 
 app = get_wsgi_application()
 
+from django.conf import settings  # noqa: E402
+
+if settings.DB_WARM_UP:
+    from utils.connections import warm_up_connections  # noqa: E402
+
+    warm_up_connections()
+
+if settings.PDF_WARM_UP:
+    from orders.pdf import warm_up_pdf_resources  # noqa: E402
+
+    warm_up_pdf_resources()
+
 app = WhiteNoise(app, root="ui/staticfiles")
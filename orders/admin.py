@@ -1,10 +1,73 @@
 from typing import Any
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Q
 from django.http import HttpRequest
 from django.http.response import HttpResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from customers.models import Customer
+from orders.jobs import enqueue_report_job
+from orders.models import (
+    Order,
+    OrderBasket,
+    PointsEvent,
+    ReportJob,
+    ReportJobKind,
+    ReportSelection,
+)
+from utils.models import BaseAdminModel, PagedAdminInline
+
+
+def print_in_background(kind, queryset):
+    """
+    Queue large selections as a background report job and send the user
+    to its status page, returns None for selections small enough to print now
+    """
+    if queryset.count() <= settings.REPORT_JOB_SYNC_LIMIT:
+        return None
+    job = enqueue_report_job(kind, queryset.values_list("id", flat=True))
+    return redirect(reverse("admin:report_job_status", args=(job.id,)))
+
+
+def open_selection_pdf(kind, queryset, url_name):
+    """
+    Save the selected ids server side and open the PDF view with its token,
+    keeping the URL short whatever the size of the selection
+    """
+    selection = ReportSelection.create_for(kind, queryset)
+    url = f"{reverse(url_name)}?selection={selection.token}"
+    return HttpResponse(
+        f'<script>window.open("{url}", "_blank").focus();</script>'
+    )
+
 
-from orders.models import Order, OrderBasket, OrderBasketStatus
-from utils.models import BaseAdminModel, BaseAdminInline
+class OrderInline(PagedAdminInline):
+    """
+    Orders of a basket or delivery provider edited in place, a page at a
+    time. New orders need a customer and are added from the order form
+    """
+
+    model = Order
+    fields = (
+        "customer",
+        "bill_id",
+        "status",
+        "total_price",
+        "delivery_charge",
+        "customer_delivery_charge",
+        "has_received_price",
+        "delivered_at",
+    )
+    readonly_fields = ("customer",)
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("customer")
 
 
 # Register your models here.
@@ -19,9 +82,15 @@ class OrderAdmin(BaseAdminModel):
         "status",
         "total_price",
     )
+    list_column_select_related = {
+        "get_customer": ("customer",),
+        "get_delivery_provider": ("delivery_provider",),
+    }
     search_fields = ("id",)
+    autocomplete_fields = ("customer", "order_basket", "delivery_provider")
+    keyset_pagination = True
+    show_full_result_count = False
     list_filter = (
-        "customer_id__full_name",
         "status",
         "delivery_provider_id__name",
     )
@@ -35,11 +104,10 @@ class OrderAdmin(BaseAdminModel):
     mark_as_delivered.short_description = "Mark as delivered"
     
     def print_to_pdf(self, request, queryset):
-        selected_ids = ",".join(str(order.id) for order in queryset)
-        url = f"/print-orders-pdf/?ids={selected_ids}"
-        return HttpResponse(
-            f'<script>window.open("{url}", "_blank").focus();</script>'
-        )
+        response = print_in_background(ReportJobKind.ORDERS, queryset)
+        if response:
+            return response
+        return open_selection_pdf(ReportJobKind.ORDERS, queryset, "admin:print_orders_pdf")
     
     print_to_pdf.short_description = "Print selected orders to PDF"
 
@@ -47,35 +115,25 @@ class OrderAdmin(BaseAdminModel):
     def get_customer(self, obj):
         return obj.customer.full_name
 
+    def get_search_results(self, request, queryset, search_term):
+        # Orders are found by id or by their customer's name or phone number
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term:
+            customers = Customer.objects.search(search_term).values("pk")
+            results |= queryset.filter(customer__in=customers)
+        return results, may_have_duplicates
+
     @admin.display(ordering="delivery_provider__name", description="Delivery Provider")
     def get_delivery_provider(self, obj):
         return obj.delivery_provider
 
     def save_model(self, request, obj, form, change):
-        # Get old object to compare total_price if this is an update
-        if change:  # If this is an update
-            old_obj = Order.objects.get(pk=obj.pk)
-            old_total_price = old_obj.total_price
-        else:  # If this is a new object
-            old_total_price = 0
-
-        # Calculate points difference
-        points_difference = int(obj.total_price - old_total_price)
-
-        # Update customer points
-        if points_difference != 0:
-            customer = obj.customer
-            customer.points += points_difference
-            customer.save()
-
         super().save_model(request, obj, form, change)
 
-        # Original basket completion check logic
-        order_basket = obj.order_basket
-        orders = order_basket.order_set.all()
-        if orders.exists() and all(order.has_received_price for order in orders):
-            order_basket.status = OrderBasketStatus.COMPLETED
-            order_basket.save()
+        # The basket is completed once none of its orders is waiting for its price
+        OrderBasket.objects.filter(pk=obj.order_basket_id).complete_received()
 
     fieldsets = (
         (
@@ -111,49 +169,10 @@ class OrderAdmin(BaseAdminModel):
     )
 
 
-class InlineOrderAdmin(BaseAdminInline):
-    model = Order
-    extra = 0
-
-    fieldsets = (
-        (
-            "Items",
-            {
-                "fields": (
-                    "total_price",
-                    "number_of_items",
-                    "items_link",
-                    "bill_id",
-                )
-            },
-        ),
-        (
-            "Delivery",
-            {
-                "fields": (
-                    "delivered_at",
-                    "delivery_charge",
-                    "delivery_provider",
-                    "customer_delivery_charge",
-                    "has_received_price",
-                )
-            },
-        ),
-        ("Status", {"fields": ("status",)}),
-        (
-            "Customer",
-            {"fields": ("customer",)},
-        ),
-        ("Order Basket", {"fields": ("order_basket",)}),
-    )
-
-
 @admin.register(OrderBasket)
 class OrderBasketAdmin(BaseAdminModel):
-    inlines = [
-        InlineOrderAdmin,
-    ]
     model = OrderBasket
+    inlines = [OrderInline]
     list_display = (
         "id",
         "tracking_number",
@@ -166,7 +185,14 @@ class OrderBasketAdmin(BaseAdminModel):
         "get_total_profit",
         "shipped_at",
     )
+    list_column_select_related = {
+        "get_shipping_provider": ("shipping_provider",),
+        "get_shipping_source": ("shipping_source",),
+    }
     search_fields = ("id", "tracking_number")
+    autocomplete_fields = ("shipping_provider", "shipping_source")
+    keyset_pagination = True
+    show_full_result_count = False
     list_filter = (
         ("shipped_at", admin.DateFieldListFilter),
         ("received_at", admin.DateFieldListFilter),
@@ -178,10 +204,11 @@ class OrderBasketAdmin(BaseAdminModel):
     actions = ["print_to_pdf"]
     
     def print_to_pdf(self, request, queryset):
-        selected_ids = ",".join(str(basket.id) for basket in queryset)
-        url = f"/print-order-baskets-pdf/?ids={selected_ids}"
-        return HttpResponse(
-            f'<script>window.open("{url}", "_blank").focus();</script>'
+        response = print_in_background(ReportJobKind.ORDER_BASKETS, queryset)
+        if response:
+            return response
+        return open_selection_pdf(
+            ReportJobKind.ORDER_BASKETS, queryset, "admin:print_order_baskets_pdf"
         )
     
     print_to_pdf.short_description = "Print selected order baskets to PDF"
@@ -247,6 +274,16 @@ class OrderBasketAdmin(BaseAdminModel):
             list_filter = list_filter[:3] + list_filter[4:]
         return list_filter
 
+    def get_search_results(self, request, queryset, search_term):
+        # By exact id or tracking number substring, which both have an index
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q(tracking_number__icontains=term)
+        if term.isdigit() and len(term) < 19:
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
+
     @admin.display(ordering="shipping_provider__name", description="Shipping Provider")
     def get_shipping_provider(self, obj):
         return obj.shipping_provider.name
@@ -268,23 +305,39 @@ class OrderBasketAdmin(BaseAdminModel):
         print("FORM", form)
         return form
 
-    def save_model(self, request, obj, form, change):
-        if change:  # Update case
-            old_obj = OrderBasket.objects.get(pk=obj.pk)
-            old_weight = old_obj.items_weight or 0
-        else:  # Creation case
-            old_weight = 0
 
-        new_weight = obj.items_weight or 0
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "created_at", "queued_seconds", "run_seconds")
+    list_filter = ("kind", "status")
+    list_per_page = 25
 
-        # Calculate points difference (1 point per 100 weight units)
-        weight_difference = new_weight - old_weight
-        points_difference = int(weight_difference / 100)
+    def has_add_permission(self, request):
+        return False
 
-        # Update shipping provider points if there's a change
-        if points_difference != 0 and obj.shipping_provider:
-            provider = obj.shipping_provider
-            provider.points += points_difference
-            provider.save()
+    def has_change_permission(self, request, obj=None):
+        return False
 
-        super().save_model(request, obj, form, change)
+
+@admin.register(PointsEvent)
+class PointsEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "reason",
+        "holder_model",
+        "holder_id",
+        "source_model",
+        "source_id",
+        "delta",
+    )
+    list_filter = ("reason", "holder_model", "source_model")
+    list_per_page = 25
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,134 @@
+import statistics
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from orders.models import Order, OrderBasket
+from utils.dashboard import DASHBOARD_CACHE_KEY
+from utils.profiling import profile_block
+
+BENCHMARK_USERNAME = "benchmark"
+
+
+class Benchmark:
+    """
+    One admin page fetched through the test client. params() is evaluated
+    before every run, setup() too, so cold-cache cases can reset state
+    """
+
+    def __init__(self, name, url_name, params=None, setup=None):
+        self.name = name
+        self.url_name = url_name
+        self.params = params or (lambda options: {})
+        self.setup = setup
+
+    def run(self, client, options):
+        if self.setup:
+            self.setup()
+        params = self.params(options)
+        with profile_block(self.name) as profile:
+            response = client.get(reverse(self.url_name), params)
+            # Streamed files only do their work while being consumed, the test
+            # client closes the response once they are
+            size = len(response.getvalue())
+        return response.status_code, size, profile
+
+
+def _date_range(options):
+    return {"date_from": (date.today() - timedelta(days=options["days"])).isoformat()}
+
+
+def _ids(queryset, options):
+    ids = queryset.order_by("-id").values_list("id", flat=True)[: options["pdf_size"]]
+    return {"ids": ",".join(str(pk) for pk in ids)}
+
+
+def _clear_dashboard():
+    cache.delete(DASHBOARD_CACHE_KEY)
+
+
+BENCHMARKS = [
+    Benchmark("overview_cold", "admin:overview", setup=_clear_dashboard),
+    Benchmark("overview", "admin:overview"),
+    Benchmark("range_summary", "admin:range_summary", _date_range),
+    Benchmark("shipping_provider_analyze", "admin:shipping_provider_analyze", _date_range),
+    Benchmark("export_range_summary", "admin:export_range_summary", _date_range),
+    Benchmark(
+        "export_shipping_provider_analyze",
+        "admin:export_shipping_provider_analyze",
+        _date_range,
+    ),
+    Benchmark(
+        "print_orders_pdf", "admin:print_orders_pdf", lambda o: _ids(Order.objects, o)
+    ),
+    Benchmark(
+        "print_order_baskets_pdf",
+        "admin:print_order_baskets_pdf",
+        lambda o: _ids(OrderBasket.objects, o),
+    ),
+    Benchmark("order_changelist", "admin:orders_order_changelist"),
+    Benchmark("order_basket_changelist", "admin:orders_orderbasket_changelist"),
+    Benchmark("customer_changelist", "admin:customers_customer_changelist"),
+    Benchmark(
+        "delivery_provider_changelist", "admin:providers_deliveryprovider_changelist"
+    ),
+    Benchmark(
+        "shipping_provider_changelist", "admin:providers_shippingprovider_changelist"
+    ),
+]
+
+
+def get_benchmark_client():
+    user, created = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME,
+        defaults={"is_staff": True, "is_superuser": True},
+    )
+    if created:
+        user.set_unusable_password()
+        user.save()
+    client = Client(HTTP_HOST="localhost")
+    client.force_login(user)
+    return client
+
+
+def run_benchmarks(names=None, repeat=5, days=365, pdf_size=50):
+    """
+    Run each benchmark `repeat` times and return its timings in milliseconds
+    with the query counts of the last run
+    """
+    options = {"days": days, "pdf_size": pdf_size}
+    client = get_benchmark_client()
+    results = {}
+    for benchmark in BENCHMARKS:
+        if names and benchmark.name not in names:
+            continue
+        timings = []
+        for _ in range(repeat):
+            status, size, profile = benchmark.run(client, options)
+            timings.append(profile.total_time * 1000)
+        results[benchmark.name] = {
+            "status": status,
+            "bytes": size,
+            "runs_ms": [round(t, 2) for t in timings],
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": profile.queries.count,
+            "duplicate_queries": profile.queries.duplicates,
+            "db_ms": round(profile.db_time * 1000, 2),
+        }
+    return results
+
+
+def compare_results(previous, current):
+    """Median change in percent of every benchmark present in both runs"""
+    changes = {}
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before or not before["median_ms"]:
+            continue
+        changes[name] = (result["median_ms"] / before["median_ms"] - 1) * 100
+    return changes
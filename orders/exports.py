@@ -0,0 +1,226 @@
+import csv
+import tempfile
+from itertools import islice
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from django.db.models import Count, Sum
+
+from .models import Order, OrderBasket, OrderStatus
+
+try:
+    # Optional, too large to ship in the serverless bundle
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_COLUMNS = (
+    ("id", "ID"),
+    ("customer__full_name", "Customer"),
+    ("status", "Status"),
+    ("total_price", "Total Price ($)"),
+    ("created_at", "Created At"),
+    ("notes", "Notes"),
+)
+
+STATUS_LABELS = dict(OrderStatus.choices)
+
+
+def get_order_totals(orders):
+    """Order count and value of the whole range in one aggregate query"""
+    return orders.aggregate(count=Count("id"), total=Sum("total_price"))
+
+
+def iter_order_rows(orders, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield one display-ready tuple per order. Customer names are joined in SQL
+    and rows are fetched with a server-side cursor, so memory stays flat
+    """
+    fields = [field for field, _ in ORDER_COLUMNS]
+    for order_id, customer, status, total_price, created_at, notes in (
+        orders.values_list(*fields).iterator(chunk_size=chunk_size)
+    ):
+        yield (
+            order_id,
+            customer or "N/A",
+            STATUS_LABELS.get(status, status),
+            total_price,
+            created_at.strftime("%Y-%m-%d %H:%M"),
+            notes or "",
+        )
+
+
+def _styled_cell(ws, value, font=None, fill=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    return cell
+
+
+def write_orders_xlsx(orders, title):
+    """
+    Write the orders into a write-only workbook backed by a temporary file
+    and return the file rewound, ready to be streamed
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Orders Report")
+
+    headers = [label for _, label in ORDER_COLUMNS]
+    for col in range(1, len(headers) + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 15
+
+    ws.append([_styled_cell(ws, title, font=Font(size=14, bold=True))])
+    ws.append([])
+
+    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    ws.append(
+        [_styled_cell(ws, header, font=Font(bold=True), fill=header_fill) for header in headers]
+    )
+
+    for row in iter_order_rows(orders):
+        ws.append(row)
+
+    totals = get_order_totals(orders)
+    bold = Font(bold=True)
+    ws.append([])
+    ws.append(
+        [
+            _styled_cell(ws, f"Total Orders: {totals['count']}", font=bold),
+            None,
+            _styled_cell(ws, "Total Value:", font=bold),
+            _styled_cell(ws, totals["total"] or 0, font=bold),
+        ]
+    )
+
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+# Columns available to the CSV and Parquet exports: name -> (ORM path, type)
+ORDER_EXPORT_FIELDS = {
+    "id": ("id", "int"),
+    "bill_id": ("bill_id", "str"),
+    "customer": ("customer__full_name", "str"),
+    "customer_phone": ("customer__phone_number", "str"),
+    "delivery_provider": ("delivery_provider__name", "str"),
+    "order_basket": ("order_basket_id", "int"),
+    "status": ("status", "str"),
+    "number_of_items": ("number_of_items", "int"),
+    "total_price": ("total_price", "float"),
+    "delivery_charge": ("delivery_charge", "float"),
+    "customer_delivery_charge": ("customer_delivery_charge", "float"),
+    "has_received_price": ("has_received_price", "bool"),
+    "ordered_at": ("ordered_at", "datetime"),
+    "delivered_at": ("delivered_at", "datetime"),
+    "created_at": ("created_at", "datetime"),
+    "notes": ("notes", "str"),
+}
+
+BASKET_EXPORT_FIELDS = {
+    "id": ("id", "int"),
+    "tracking_number": ("tracking_number", "str"),
+    "shipping_provider": ("shipping_provider__name", "str"),
+    "shipping_source": ("shipping_source__name", "str"),
+    "status": ("status", "str"),
+    "number_of_items": ("number_of_items", "int"),
+    "items_weight": ("items_weight", "float"),
+    "total_price": ("total_price", "float"),
+    "total_paid_price": ("total_paid_price", "float"),
+    "shipping_charge": ("shipping_charge", "float"),
+    "orders_count": ("orders_count", "int"),
+    "received_orders_count": ("received_orders_count", "int"),
+    "orders_total_price": ("orders_total_price", "float"),
+    "orders_delivery_charge": ("orders_delivery_charge", "float"),
+    "shipped_at": ("shipped_at", "datetime"),
+    "received_at": ("received_at", "datetime"),
+    "created_at": ("created_at", "datetime"),
+    "notes": ("notes", "str"),
+}
+
+EXPORT_DATASETS = {
+    "orders": (Order, ORDER_EXPORT_FIELDS),
+    "baskets": (OrderBasket, BASKET_EXPORT_FIELDS),
+}
+
+
+def parse_export_columns(fields, columns_str):
+    """
+    Turn the comma separated columns parameter into a list of column names,
+    defaulting to every column. Raises ValueError on unknown columns
+    """
+    if not columns_str:
+        return list(fields)
+
+    columns = [column.strip() for column in columns_str.split(",") if column.strip()]
+    unknown = [column for column in columns if column not in fields]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return columns
+
+
+def _iter_batches(queryset, fields, columns, chunk_size):
+    paths = [fields[column][0] for column in columns]
+    rows = queryset.values_list(*paths).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+class _Echo:
+    """File-like object handing csv.writer output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, fields, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the CSV a batch of rows at a time, memory stays constant
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for batch in _iter_batches(queryset, fields, columns, chunk_size):
+        yield "".join(writer.writerow(row) for row in batch)
+
+
+def parquet_available():
+    return pyarrow is not None
+
+
+def write_parquet(queryset, fields, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write the rows to a Parquet file, one row group per batch, and
+    return the temporary file rewound, ready to be streamed
+    """
+    arrow_types = {
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "bool": pyarrow.bool_(),
+        "str": pyarrow.string(),
+        "datetime": pyarrow.timestamp("us", tz="UTC"),
+    }
+    schema = pyarrow.schema(
+        [(column, arrow_types[fields[column][1]]) for column in columns]
+    )
+
+    output = tempfile.TemporaryFile()
+    with pyarrow.parquet.ParquetWriter(output, schema, compression="zstd") as writer:
+        for batch in _iter_batches(queryset, fields, columns, chunk_size):
+            arrays = [
+                pyarrow.array(values, type=field.type)
+                for values, field in zip(zip(*batch), schema)
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+    output.seek(0)
+    return output
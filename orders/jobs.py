@@ -0,0 +1,158 @@
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import ReportJob, ReportJobKind, ReportJobStatus
+from .reports import (
+    build_order_baskets_pdf,
+    build_orders_report,
+    get_report_baskets,
+    get_report_orders,
+)
+
+logger = logging.getLogger(__name__)
+
+# Transaction-level advisory lock held while a job is claimed, so workers
+# check the running count one at a time
+CLAIM_LOCK_KEY = 0x5245504F5254
+
+REPORT_BUILDERS = {
+    ReportJobKind.ORDERS: (get_report_orders, build_orders_report),
+    ReportJobKind.ORDER_BASKETS: (get_report_baskets, build_order_baskets_pdf),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.REPORT_JOB_CONCURRENCY,
+                thread_name_prefix="report-job",
+            )
+    return _executor
+
+
+def enqueue_report_job(kind, object_ids):
+    """
+    Queue a PDF report and wake a local worker once the job is committed.
+    Jobs left behind (e.g. by a frozen serverless process) are picked up
+    by the run_report_worker command
+    """
+    job = ReportJob.objects.create(kind=kind, object_ids=list(object_ids))
+    transaction.on_commit(lambda: _get_executor().submit(run_pending_jobs))
+    return job
+
+
+def _lock_claims():
+    # Other databases serialize writing transactions on their own
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CLAIM_LOCK_KEY])
+
+
+def claim_next_job():
+    """
+    Mark the oldest pending job as running and return it, or None when the
+    queue is empty or REPORT_JOB_CONCURRENCY jobs are already running
+    """
+    with transaction.atomic():
+        _lock_claims()
+        now = timezone.now()
+        # Jobs running past the timeout died with their worker
+        ReportJob.objects.filter(
+            status=ReportJobStatus.RUNNING,
+            started_at__lt=now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT),
+        ).update(status=ReportJobStatus.FAILED, error="Timed out", finished_at=now)
+
+        running = ReportJob.objects.filter(status=ReportJobStatus.RUNNING).count()
+        if running >= settings.REPORT_JOB_CONCURRENCY:
+            return None
+
+        job = (
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ReportJobStatus.PENDING)
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = ReportJobStatus.RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def _discard(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def run_job(job):
+    """
+    Build the PDF of a claimed job. It is rendered to a temporary file and
+    moved into place only if the job is still running when the build ends,
+    claim_next_job may have failed it for running past REPORT_JOB_TIMEOUT
+    """
+    get_queryset, build = REPORT_BUILDERS[job.kind]
+    path = os.path.join(settings.REPORT_JOBS_DIR, f"{job.kind}_{job.pk}.pdf")
+    partial = None
+    try:
+        os.makedirs(settings.REPORT_JOBS_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=settings.REPORT_JOBS_DIR, suffix=".partial", delete=False
+        ) as output:
+            partial = output.name
+            build(get_queryset(job.object_ids), output)
+        result = {"status": ReportJobStatus.DONE, "file_path": path}
+    except Exception as e:
+        logger.exception("Report job %s failed", job.pk)
+        result = {"status": ReportJobStatus.FAILED, "error": str(e)}
+
+    with transaction.atomic():
+        finished = ReportJob.objects.filter(
+            pk=job.pk, status=ReportJobStatus.RUNNING
+        ).update(finished_at=timezone.now(), **result)
+        if finished and result["status"] == ReportJobStatus.DONE:
+            os.replace(partial, path)
+            partial = None
+    if partial is not None:
+        _discard(partial)
+
+    job.refresh_from_db()
+    if not finished:
+        logger.warning("Report job %s ended after it was marked %s", job.pk, job.status)
+        return
+    logger.info(
+        "Report job %s %s, queued %.2fs, ran %.2fs",
+        job.pk,
+        job.status,
+        job.queued_seconds,
+        job.run_seconds,
+    )
+
+
+def run_pending_jobs():
+    """Run queued jobs until the queue is empty or the concurrency limit is hit"""
+    try:
+        while True:
+            job = claim_next_job()
+            if job is None:
+                return
+            run_job(job)
+    finally:
+        # Worker threads own their database connection
+        close_old_connections()
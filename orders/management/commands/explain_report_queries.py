@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.explain import find_sequential_scans, get_report_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on every registered report query and flag sequential scans. "
+        "Planners scan small tables on purpose, run it on realistic data "
+        "(see generate_synthetic_data)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Only explain these queries")
+        parser.add_argument(
+            "--analyze", action="store_true", help="Run the queries (EXPLAIN ANALYZE)"
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the full plan of every query"
+        )
+        parser.add_argument(
+            "--fail-on-seq-scan",
+            action="store_true",
+            help="Exit with an error when a query scans a whole table",
+        )
+
+    def handle(self, *args, **options):
+        queries = get_report_queries()
+        unknown = set(options["names"]) - queries.keys()
+        if unknown:
+            raise CommandError(f"Unknown report queries: {', '.join(sorted(unknown))}")
+
+        explain_options = {"analyze": True} if options["analyze"] else {}
+        flagged = []
+        for name, build in queries.items():
+            if options["names"] and name not in options["names"]:
+                continue
+            plan = build().explain(**explain_options)
+            tables = find_sequential_scans(plan)
+            if tables:
+                flagged.append(name)
+                self.stdout.write(
+                    self.style.WARNING(f"{name}: sequential scan on {', '.join(tables)}")
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: OK"))
+            if options["plans"] or tables:
+                self.stdout.write(plan)
+
+        if flagged and options["fail_on_seq_scan"]:
+            raise CommandError(f"Sequential scans in: {', '.join(flagged)}")
@@ -0,0 +1,235 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from customers.models import Customer
+from expenses.models import Expense, ExpenseCategory
+from orders.models import Order, OrderBasket, OrderBasketStatus, OrderStatus
+from providers.models import DeliveryProvider, ShippingProvider, ShippingSource
+
+FIRST_NAMES = (
+    "محمد", "أحمد", "علي", "حسن", "حسين", "عمر", "خالد", "يوسف", "إبراهيم", "مصطفى",
+    "فاطمة", "زينب", "مريم", "نور", "سارة", "ليلى", "هدى", "رنا", "آمنة", "سلمى",
+)
+FAMILY_NAMES = (
+    "الحسيني", "العلي", "الخطيب", "الأمين", "حيدر", "سليمان", "الموسوي", "شمس الدين",
+    "فضل الله", "عيسى", "نصر الله", "الزين", "قاسم", "حمود", "بزي", "عطوي",
+)
+CITIES = ("بيروت", "صيدا", "صور", "النبطية", "طرابلس", "زحلة", "بعلبك", "جونيه")
+EXPENSE_CATEGORIES = ("Rent", "Salaries", "Packaging", "Fuel", "Marketing")
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic customers, providers, order baskets, "
+        "orders and expenses for benchmarking. Rows are written with bulk_create, "
+        "which keeps the capital ledger and daily rollups up to date"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--orders", type=int, default=10_000, help="Number of orders to create"
+        )
+        parser.add_argument(
+            "--orders-per-basket", type=int, default=10, help="Average orders per basket"
+        )
+        parser.add_argument(
+            "--customers", type=int, help="Number of customers, orders / 20 by default"
+        )
+        parser.add_argument("--delivery-providers", type=int, default=10)
+        parser.add_argument("--shipping-providers", type=int, default=5)
+        parser.add_argument("--shipping-sources", type=int, default=5)
+        parser.add_argument(
+            "--expenses", type=int, help="Number of expenses, orders / 100 by default"
+        )
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread the rows over the last N days"
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if options["orders"] < 1 or options["orders_per_basket"] < 1:
+            raise CommandError("--orders and --orders-per-basket must be positive")
+
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.days = max(options["days"], 1)
+
+        order_count = options["orders"]
+        customer_count = options["customers"] or max(order_count // 20, 1)
+        basket_count = max(order_count // options["orders_per_basket"], 1)
+        expense_count = options["expenses"]
+        if expense_count is None:
+            expense_count = max(order_count // 100, 1)
+
+        sources = self.create_named(ShippingSource, options["shipping_sources"])
+        shipping_providers = self.create_providers(
+            ShippingProvider, options["shipping_providers"], price_per_kg=5, address="-"
+        )
+        delivery_providers = self.create_providers(
+            DeliveryProvider, options["delivery_providers"]
+        )
+        customer_ids = self.create_customers(customer_count)
+        baskets = self.create_baskets(basket_count, shipping_providers, sources)
+        self.create_orders(order_count, customer_ids, baskets, delivery_providers)
+        self.create_expenses(expense_count)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {customer_count} customers, {basket_count} baskets, "
+                f"{order_count} orders and {expense_count} expenses"
+            )
+        )
+
+    def random_moment(self):
+        return self.now - timedelta(seconds=self.random.randrange(self.days * 86400))
+
+    def bulk_create(self, model, rows, keep=True):
+        """
+        Insert rows from an iterable in batches, returns the created objects.
+        The model querysets record the capital and rollup changes of each batch
+        """
+        created = []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                objs = self.create_batch(model, batch)
+                if keep:
+                    created += objs
+                batch = []
+        if batch:
+            objs = self.create_batch(model, batch)
+            if keep:
+                created += objs
+        return created
+
+    def create_batch(self, model, batch):
+        """
+        bulk_create one batch. auto_now_add overwrites the created_at of the
+        rows with the current time, so the generated moments are written back
+        with bulk_update, which moves the rows' rollups to those days
+        """
+        moments = [obj.created_at for obj in batch]
+        objs = model.objects.bulk_create(batch)
+        if any(moment is not None for moment in moments):
+            for obj, moment in zip(objs, moments):
+                obj.created_at = moment
+            model.objects.bulk_update(objs, ["created_at"])
+        return objs
+
+    def create_named(self, model, count):
+        return self.bulk_create(
+            model, (model(name=f"{model._meta.verbose_name} {n}") for n in range(1, count + 1))
+        )
+
+    def create_providers(self, model, count, **fields):
+        # Providers use multi-table inheritance, which bulk_create does not support
+        return [
+            model.objects.create(
+                name=f"{self.random.choice(FAMILY_NAMES)} {n}",
+                phone_number=f"+961 {self.random.randrange(10**7, 10**8)}",
+                **fields,
+            )
+            for n in range(1, count + 1)
+        ]
+
+    def create_customers(self, count):
+        customers = self.bulk_create(
+            Customer,
+            (
+                Customer(
+                    full_name=f"{self.random.choice(FIRST_NAMES)} {self.random.choice(FAMILY_NAMES)}",
+                    phone_number=f"+961 {self.random.randrange(10**7, 10**8)}",
+                    address=f"{self.random.choice(CITIES)}، شارع {self.random.randrange(1, 200)}",
+                    notes=[],
+                    created_at=self.random_moment(),
+                )
+                for _ in range(count)
+            ),
+        )
+        return [customer.pk for customer in customers]
+
+    def create_baskets(self, count, providers, sources):
+        statuses = OrderBasketStatus.values
+
+        def rows():
+            for _ in range(count):
+                created_at = self.random_moment()
+                total_price = round(self.random.uniform(100, 5000), 2)
+                status = self.random.choice(statuses)
+                yield OrderBasket(
+                    tracking_number=f"TRK{self.random.randrange(10**9, 10**10)}",
+                    total_price=total_price,
+                    total_paid_price=round(total_price * self.random.uniform(0.6, 0.9), 2),
+                    number_of_items=self.random.randrange(1, 50),
+                    items_weight=round(self.random.uniform(0.5, 80), 2),
+                    shipping_charge=round(self.random.uniform(10, 300), 2),
+                    shipped_at=created_at,
+                    received_at=(
+                        created_at + timedelta(days=self.random.randrange(3, 21))
+                        if status != OrderBasketStatus.SHIPPING
+                        else None
+                    ),
+                    status=status,
+                    shipping_provider=self.random.choice(providers),
+                    shipping_source=self.random.choice(sources),
+                    created_at=created_at,
+                )
+
+        baskets = self.bulk_create(OrderBasket, rows())
+        # Only what orders need is kept, so large runs stay light on memory
+        return [(basket.pk, basket.created_at) for basket in baskets]
+
+    def create_orders(self, count, customer_ids, baskets, providers):
+        statuses = OrderStatus.values
+
+        def rows():
+            for _ in range(count):
+                basket_id, basket_created_at = self.random.choice(baskets)
+                created_at = min(
+                    basket_created_at + timedelta(hours=self.random.randrange(1, 240)),
+                    self.now,
+                )
+                status = self.random.choice(statuses)
+                delivered = status in (OrderStatus.DELIVERED, OrderStatus.COMPLETED)
+                yield Order(
+                    total_price=round(self.random.uniform(5, 500), 2),
+                    number_of_items=self.random.randrange(1, 10),
+                    bill_id=f"B{self.random.randrange(10**6, 10**7)}",
+                    delivery_charge=round(self.random.uniform(1, 10), 2),
+                    customer_delivery_charge=round(self.random.uniform(2, 12), 2),
+                    ordered_at=created_at,
+                    delivered_at=created_at + timedelta(days=2) if delivered else None,
+                    has_received_price=status == OrderStatus.COMPLETED,
+                    status=status,
+                    customer_id=self.random.choice(customer_ids),
+                    order_basket_id=basket_id,
+                    delivery_provider=self.random.choice(providers),
+                    created_at=created_at,
+                )
+
+        # Orders are not kept around, so large runs stay light on memory
+        self.bulk_create(Order, rows(), keep=False)
+
+    def create_expenses(self, count):
+        categories = self.bulk_create(
+            ExpenseCategory, (ExpenseCategory(name=name) for name in EXPENSE_CATEGORIES)
+        )
+
+        def rows():
+            for n in range(count):
+                created_at = self.random_moment()
+                yield Expense(
+                    name=f"Expense {n + 1}",
+                    amount=round(self.random.uniform(10, 2000), 2),
+                    date=created_at.date(),
+                    category=self.random.choice(categories),
+                    created_at=created_at,
+                )
+
+        self.bulk_create(Expense, rows())
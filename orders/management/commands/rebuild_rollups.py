@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from expenses.models import ExpenseDailyRollup
+from orders.models import OrderBasketDailyRollup, OrderDailyRollup
+from utils.dashboard import invalidate_dashboard
+
+
+class Command(BaseCommand):
+    help = "Backfill the daily rollup tables of orders, order baskets and expenses"
+
+    def handle(self, *args, **options):
+        for rollup in (OrderDailyRollup, OrderBasketDailyRollup, ExpenseDailyRollup):
+            count = rollup.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(f"{rollup.__name__}: {count} rows rebuilt")
+            )
+        invalidate_dashboard()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import Order, OrderBasket, PointsEvent
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the points of every customer from their orders and of every "
+        "shipping provider from their order baskets, logging the corrections"
+    )
+
+    def handle(self, *args, **options):
+        for model in (Order, OrderBasket):
+            holder = model._meta.get_field(model.points_holder).related_model
+            count = PointsEvent.recompute(model)
+            self.stdout.write(
+                self.style.SUCCESS(f"{holder.__name__}: {count} points balances corrected")
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import OrderBasket
+
+
+class Command(BaseCommand):
+    help = "Recompute the order counts and totals stored on every order basket"
+
+    def handle(self, *args, **options):
+        count = OrderBasket.rebuild_order_totals()
+        self.stdout.write(self.style.SUCCESS(f"OrderBasket: {count} rows reconciled"))
@@ -0,0 +1,91 @@
+import json
+import platform
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from customers.models import Customer
+from orders.benchmarks import BENCHMARKS, compare_results, run_benchmarks
+from orders.models import Order, OrderBasket
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the reports, exports, PDF views and admin changelists against the "
+        "current database and write the results as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            choices=[benchmark.name for benchmark in BENCHMARKS],
+            help="Run these benchmarks only",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+        parser.add_argument(
+            "--days", type=int, default=365, help="Date range of the report views"
+        )
+        parser.add_argument(
+            "--pdf-size", type=int, default=50, help="Rows printed by the PDF views"
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+        parser.add_argument("--compare", help="Previous JSON results to compare with")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help="Fail when a median gets slower than this percentage",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be positive")
+
+        results = run_benchmarks(
+            names=options["only"],
+            repeat=options["repeat"],
+            days=options["days"],
+            pdf_size=options["pdf_size"],
+        )
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "dataset": {
+                "orders": Order.objects.count(),
+                "order_baskets": OrderBasket.objects.count(),
+                "customers": Customer.objects.count(),
+            },
+            "repeat": options["repeat"],
+            "results": results,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            self.compare(options["compare"], results, options["max_regression"])
+
+    def compare(self, path, results, max_regression):
+        try:
+            with open(path) as f:
+                previous = json.load(f)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        regressions = []
+        for name, change in compare_results(previous, results).items():
+            line = f"{name}: {previous[name]['median_ms']} ms -> {results[name]['median_ms']} ms ({change:+.1f}%)"
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+                self.stderr.write(self.style.ERROR(line))
+            else:
+                self.stderr.write(line)
+
+        if regressions:
+            raise CommandError(f"Slower than allowed: {', '.join(regressions)}")
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Render queued PDF report jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once the queue is empty"
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2, help="Seconds between queue polls"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            run_pending_jobs()
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,107 @@
+# Generated by Django 4.2.13 on 2026-10-17 16:16
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+import django.db.models.deletion
+
+
+def backfill(source, rollup, dimensions, metrics):
+    def run(apps, schema_editor):
+        Source = apps.get_model(*source)
+        Rollup = apps.get_model(*rollup)
+        rows = (
+            Source.objects.filter(deleted_at__isnull=True)
+            .annotate(day=TruncDate("created_at"))
+            .values("day", *dimensions)
+            .annotate(
+                row_count=Count("pk"),
+                **{
+                    metric: Coalesce(Sum(metric), 0, output_field=output_field)
+                    for metric, output_field in metrics.items()
+                },
+            )
+            .order_by()
+        )
+        Rollup.objects.bulk_create((Rollup(**row) for row in rows), batch_size=1000)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0004_shippingprovider_points'),
+        ('orders', '0011_orderbasket_tracking_number'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('row_count', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('boxing', 'Boxing'), ('delivered', 'Delivered'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20)),
+                ('has_received_price', models.BooleanField()),
+                ('total_price', models.FloatField(default=0)),
+                ('number_of_items', models.IntegerField(default=0)),
+                ('delivery_charge', models.FloatField(default=0)),
+                ('customer_delivery_charge', models.FloatField(default=0)),
+                ('delivery_provider', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='providers.deliveryprovider')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderBasketDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('row_count', models.IntegerField(default=0)),
+                ('status', models.CharField(choices=[('shipping', 'Shipping'), ('received', 'Received'), ('completed', 'Completed'), ('rejected', 'Rejected')], max_length=20)),
+                ('total_price', models.FloatField(default=0)),
+                ('total_paid_price', models.FloatField(default=0)),
+                ('number_of_items', models.IntegerField(default=0)),
+                ('items_weight', models.FloatField(default=0)),
+                ('shipping_charge', models.FloatField(default=0)),
+                ('shipping_provider', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, to='providers.shippingprovider')),
+                ('shipping_source', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='providers.shippingsource')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'status', 'has_received_price', 'delivery_provider'), name='unique_order_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderbasketdailyrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'status', 'shipping_provider', 'shipping_source'), name='unique_order_basket_daily_rollup'),
+        ),
+        migrations.RunPython(
+            backfill(
+                ("orders", "Order"),
+                ("orders", "OrderDailyRollup"),
+                ("status", "has_received_price", "delivery_provider_id"),
+                {
+                    "total_price": models.FloatField(),
+                    "number_of_items": models.IntegerField(),
+                    "delivery_charge": models.FloatField(),
+                    "customer_delivery_charge": models.FloatField(),
+                },
+            ),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(
+            backfill(
+                ("orders", "OrderBasket"),
+                ("orders", "OrderBasketDailyRollup"),
+                ("status", "shipping_provider_id", "shipping_source_id"),
+                {
+                    "total_price": models.FloatField(),
+                    "total_paid_price": models.FloatField(),
+                    "number_of_items": models.IntegerField(),
+                    "items_weight": models.FloatField(),
+                    "shipping_charge": models.FloatField(),
+                },
+            ),
+            migrations.RunPython.noop,
+        ),
+    ]
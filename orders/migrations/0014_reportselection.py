@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-17 16:22
+
+from django.db import migrations, models
+import orders.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSelection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(default=orders.models._selection_token, max_length=32, unique=True)),
+                ('kind', models.CharField(choices=[('orders', 'Orders'), ('order_baskets', 'Order Baskets')], max_length=20)),
+                ('object_ids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0014_reportselection'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='order_live_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at'], name='order_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['id'], name='basket_live_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at'], name='basket_live_created_idx'),
+        ),
+    ]
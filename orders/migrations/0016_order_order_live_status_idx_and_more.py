@@ -0,0 +1,45 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_order_order_live_id_idx_order_order_live_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', 'id'], name='order_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['has_received_price', 'total_price'], name='order_received_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['delivery_provider', 'has_received_price', 'total_price'], name='order_provider_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['order_basket', 'has_received_price'], name='order_basket_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['shipping_provider', 'created_at'], name='basket_provider_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['status', 'id'], name='basket_live_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['shipped_at'], name='basket_live_shipped_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['received_at'], name='basket_live_received_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_order_order_live_status_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_live_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='orderbasket',
+            name='basket_live_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at', 'id'], name='order_live_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['created_at', 'id'], name='basket_live_created_id_idx'),
+        ),
+    ]
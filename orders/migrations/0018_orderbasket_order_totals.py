@@ -0,0 +1,62 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:29
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_order_totals(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    OrderBasket = apps.get_model("orders", "OrderBasket")
+    orders = (
+        Order.objects.filter(order_basket=OuterRef("pk"), deleted_at__isnull=True)
+        .order_by()
+        .values("order_basket")
+    )
+
+    def total(aggregate, output_field):
+        return Coalesce(
+            Subquery(orders.annotate(total=aggregate).values("total")),
+            Value(0),
+            output_field=output_field,
+        )
+
+    OrderBasket.objects.update(
+        orders_count=total(Count("pk"), models.IntegerField()),
+        received_orders_count=total(
+            Count("pk", filter=Q(has_received_price=True)), models.IntegerField()
+        ),
+        orders_total_price=total(Sum("total_price"), models.FloatField()),
+        orders_delivery_charge=total(Sum("delivery_charge"), models.FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0017_remove_order_order_live_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderbasket',
+            name='orders_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderbasket',
+            name='orders_delivery_charge',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderbasket',
+            name='orders_total_price',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orderbasket',
+            name='received_orders_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0018_orderbasket_order_totals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointsEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('holder_model', models.CharField(max_length=100)),
+                ('holder_id', models.BigIntegerField()),
+                ('source_model', models.CharField(max_length=100)),
+                ('source_id', models.BigIntegerField(blank=True, null=True)),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('accrual', 'Accrual'), ('recompute', 'Recompute')], default='accrual', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['holder_model', 'holder_id', 'created_at'], name='orders_poin_holder__234030_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:38
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0019_pointsevent'),
+        # Enables pg_trgm
+        ('customers', '0006_customer_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderbasket',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('tracking_number', models.TextField())), name='gin_trgm_ops'), condition=models.Q(('deleted_at__isnull', True)), name='basket_tracking_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0020_orderbasket_tracking_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['order_basket', 'created_at', 'id'], name='order_basket_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['delivery_provider', 'has_received_price', 'created_at', 'id'], name='order_provider_created_id_idx'),
+        ),
+    ]
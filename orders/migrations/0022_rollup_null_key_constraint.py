@@ -0,0 +1,62 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:48
+
+from django.db import migrations, models
+from django.db.models import Count
+import utils.models
+
+
+def merge_duplicate_rows(Rollup, keys):
+    """Fold rollup rows the old constraint let through into one per key"""
+    metrics = [
+        field.name
+        for field in Rollup._meta.concrete_fields
+        if not field.primary_key and field.name not in keys
+    ]
+    duplicates = (
+        Rollup.objects.values(*keys).annotate(rows=Count("pk")).filter(rows__gt=1)
+    )
+    for key in duplicates:
+        rows = list(Rollup.objects.filter(**{k: key[k] for k in keys}).order_by("pk"))
+        kept = rows[0]
+        for metric in metrics:
+            setattr(kept, metric, sum(getattr(row, metric) for row in rows))
+        kept.save()
+        Rollup.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    merge_duplicate_rows(
+        apps.get_model("orders", "OrderDailyRollup"),
+        ["day", "status", "has_received_price", "delivery_provider"],
+    )
+    merge_duplicate_rows(
+        apps.get_model("orders", "OrderBasketDailyRollup"),
+        ["day", "status", "shipping_provider", "shipping_source"],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0021_order_related_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='orderbasketdailyrollup',
+            name='unique_order_basket_daily_rollup',
+        ),
+        migrations.RemoveConstraint(
+            model_name='orderdailyrollup',
+            name='unique_order_daily_rollup',
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='orderbasketdailyrollup',
+            constraint=models.UniqueConstraint(models.F('day'), models.F('status'), models.F('shipping_provider'), utils.models.NullKey('shipping_source'), name='unique_order_basket_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='orderdailyrollup',
+            constraint=models.UniqueConstraint(models.F('day'), models.F('status'), models.F('has_received_price'), utils.models.NullKey('delivery_provider'), name='unique_order_daily_rollup'),
+        ),
+    ]
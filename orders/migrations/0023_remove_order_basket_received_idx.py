@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 19:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0022_rollup_null_key_constraint'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_basket_received_idx',
+        ),
+    ]
@@ -1,7 +1,24 @@
-from django.db import models
-
-from expenses.models import Capital
-from utils.models import BaseModel
+import math
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Floor, Upper
+from django.utils import timezone
+
+from expenses.models import Capital, CapitalEntryReason
+from utils.dashboard import invalidate_dashboard
+from utils.models import (
+    LIVE_ROWS,
+    AccountedQuerySet,
+    BaseModel,
+    BaseRollup,
+    NullKey,
+    SoftDeleteManager,
+)
 
 
 class OrderStatus(models.TextChoices):
@@ -19,25 +36,232 @@ class OrderBasketStatus(models.TextChoices):
     REJECTED = "rejected"
 
 
-class OrderManager(models.Manager):
+# OrderBasket columns totalling its live orders, see OrderBasket.record_orders
+BASKET_ORDER_TOTALS = (
+    "orders_count",
+    "received_orders_count",
+    "orders_total_price",
+    "orders_delivery_charge",
+)
+
+
+class PointsQuerySet(AccountedQuerySet, abstract=True):
+    """
+    AccountedQuerySet of rows earning points for the row their model's
+    points_holder foreign key points to. update(), delete(), restore() and
+    bulk_create() move the points with one grouped query, see PointsEvent.
+    Subclasses name the fields the points are computed from and build the
+    per-row points from a mapping of field attname to expression
+    """
+
+    points_fields = ()
+    # points_expression(columns), a staticmethod
+    points_expression = None
+    required_attributes = AccountedQuerySet.required_attributes + ("points_expression",)
+
+    def _points_columns(self):
+        holder = self.model._meta.get_field(self.model.points_holder).attname
+        return holder, {holder, "deleted_at", *self.points_fields}
+
+    def points_by_holder(self):
+        """Points earned by the live rows, one row per holder"""
+        holder, fields = self._points_columns()
+        columns = {name: F(name) for name in fields}
+        return (
+            self.live()
+            .order_by()
+            .values(holder)
+            .annotate(points=Sum(self.points_expression(columns)))
+        )
+
+    def update(self, **kwargs):
+        columns = self._update_columns(kwargs)
+        holder, fields = self._points_columns()
+        if not columns.keys() & fields:
+            return super().update(**kwargs)
+        if not self._rows_locked:
+            with transaction.atomic(using=self.db, savepoint=False):
+                return self._lock_rows().update(**kwargs)
+
+        old = {name: F(name) for name in fields}
+        new = {**old, **{name: columns[name] for name in columns.keys() & fields}}
+        groups = (
+            self.order_by()
+            .values(old_holder=old[holder], new_holder=new[holder])
+            .annotate(
+                **{
+                    f"{state}_points": Sum(
+                        self._live(values["deleted_at"]) * self.points_expression(values)
+                    )
+                    for state, values in (("old", old), ("new", new))
+                }
+            )
+        )
+        with transaction.atomic(using=self.db, savepoint=False):
+            groups = list(groups)
+            rows = super().update(**kwargs)
+            deltas = {}
+            for group in groups:
+                for state, sign in (("old", -1), ("new", 1)):
+                    PointsEvent.add_points(
+                        deltas, group[f"{state}_holder"], sign * (group[f"{state}_points"] or 0)
+                    )
+            PointsEvent.award(self.model, deltas)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            PointsEvent.record(self.model, ((None, obj) for obj in objs))
+        return objs
+
+
+class OrderQuerySet(PointsQuerySet):
+    capital_fields = ("total_price", "has_received_price", "delivery_charge")
+    points_fields = ("total_price",)
+    # Order columns the basket order totals are computed from
+    basket_total_fields = (
+        "order_basket_id",
+        "deleted_at",
+        "has_received_price",
+        "total_price",
+        "delivery_charge",
+    )
+
+    @staticmethod
+    def capital_expression(columns):
+        # The price once received from the customer, minus the delivery charge
+        received = Cast(columns["has_received_price"], models.IntegerField())
+        return received * columns["total_price"] - Coalesce(
+            columns["delivery_charge"], Value(0.0)
+        )
+
+    def get_rollup(self):
+        return OrderDailyRollup
+
+    @staticmethod
+    def points_expression(columns):
+        return Cast(Floor(columns["total_price"]), models.IntegerField())
+
+    @staticmethod
+    def basket_total_expressions(columns):
+        """What one live order adds to each basket order total"""
+        return {
+            "orders_count": Value(1),
+            "received_orders_count": Cast(
+                columns["has_received_price"], models.IntegerField()
+            ),
+            "orders_total_price": columns["total_price"],
+            "orders_delivery_charge": Coalesce(columns["delivery_charge"], Value(0.0)),
+        }
+
+    def _basket_total_groups(self, columns):
+        """
+        Group the matching rows by their basket before and after the update,
+        with what they add to the basket order totals in each state
+        """
+        old = {name: F(name) for name in self.basket_total_fields}
+        new = {**old, **{name: columns[name] for name in columns.keys() & old.keys()}}
+        totals = {}
+        for state, values in (("old", old), ("new", new)):
+            live = self._live(values["deleted_at"])
+            for field, expression in self.basket_total_expressions(values).items():
+                totals[f"{state}_{field}"] = Sum(
+                    live * expression, output_field=OrderBasket._meta.get_field(field)
+                )
+        return (
+            self.order_by()
+            .values(old_basket=F("order_basket_id"), new_basket=new["order_basket_id"])
+            .annotate(**totals)
+        )
+
+    def update(self, **kwargs):
+        columns = self._update_columns(kwargs)
+        if not columns.keys() & set(self.basket_total_fields):
+            return super().update(**kwargs)
+        if not self._rows_locked:
+            with transaction.atomic(using=self.db, savepoint=False):
+                return self._lock_rows().update(**kwargs)
+
+        # Runs inside the transaction _lock_rows() was called in, no savepoint
+        with transaction.atomic(using=self.db, savepoint=False):
+            groups = list(self._basket_total_groups(columns))
+            rows = super().update(**kwargs)
+            changes = {}
+            for group in groups:
+                for state, sign in (("old", -1), ("new", 1)):
+                    OrderBasket.add_order_totals(
+                        changes,
+                        group[f"{state}_basket"],
+                        sign,
+                        {field: group[f"{state}_{field}"] for field in BASKET_ORDER_TOTALS},
+                    )
+            OrderBasket.apply_order_totals(changes)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            OrderBasket.record_orders((None, obj) for obj in objs)
+        return objs
+
+
+class OrderBasketQuerySet(PointsQuerySet):
+    capital_fields = ("total_paid_price", "shipping_charge")
+    points_fields = ("items_weight",)
+
+    @staticmethod
+    def capital_expression(columns):
+        return -(
+            Coalesce(columns["total_paid_price"], Value(0.0))
+            + Coalesce(columns["shipping_charge"], Value(0.0))
+        )
+
+    def get_rollup(self):
+        return OrderBasketDailyRollup
+
+    @staticmethod
+    def points_expression(columns):
+        weight = Coalesce(columns["items_weight"], Value(0.0))
+        return Cast(Floor(weight / Value(100.0)), models.IntegerField())
+
+    def ready_to_complete(self):
+        """Baskets not yet completed whose orders have all received their price"""
+        return self.exclude(status=OrderBasketStatus.COMPLETED).filter(
+            received_orders_count=F("orders_count")
+        )
+
+    def complete_received(self):
+        """Complete the baskets whose orders have all received their price"""
+        return self.ready_to_complete().update(
+            status=OrderBasketStatus.COMPLETED, updated_at=timezone.now()
+        )
+
+
+class OrderManager(SoftDeleteManager.from_queryset(OrderQuerySet)):
+    # Money totals are answered from OrderDailyRollup, their cost depends
+    # on the number of days rather than the number of orders
+
     def get_total_price(self):
-        return self.get_queryset().aggregate(r=models.Sum("total_price")).get("r")
+        return OrderDailyRollup.objects.aggregate(r=models.Sum("total_price")).get("r")
 
     def get_total_paid_price(self):
         return self.get_queryset().aggregate(r=models.Sum("total_paid_price")).get("r")
 
     def get_missing_money_from_all_providers(self):
         return (
-            self.get_queryset()
-            .filter(has_received_price=False)
+            OrderDailyRollup.objects.filter(has_received_price=False)
             .aggregate(r=models.Sum("total_price"))
             .get("r")
         )
 
     def get_all_received_money_from_orders(self):
         return (
-            self.get_queryset()
-            .filter(has_received_price=True)
+            OrderDailyRollup.objects.filter(has_received_price=True)
             .aggregate(r=models.Sum("customer_delivery_charge"))
             .get("r")
         )
@@ -47,6 +271,9 @@ class OrderManager(models.Manager):
 class Order(BaseModel):
 
     objects = OrderManager()
+    all_objects = OrderQuerySet.as_manager()
+    # 1 point for the customer per whole unit of the order price
+    points_holder = "customer"
 
     id = models.AutoField(primary_key=True)
     total_price = models.FloatField()
@@ -69,6 +296,45 @@ class Order(BaseModel):
         "providers.DeliveryProvider", on_delete=models.CASCADE, null=True, blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=LIVE_ROWS, name="order_live_id_idx"),
+            # Newest first, the trailing id keeps keyset pages in index order
+            models.Index(
+                fields=["created_at", "id"],
+                condition=LIVE_ROWS,
+                name="order_live_created_id_idx",
+            ),
+            # Changelist status filter, newest first
+            models.Index(
+                fields=["status", "id"], condition=LIVE_ROWS, name="order_live_status_idx"
+            ),
+            # Received / missing money totals, answered from the index alone
+            models.Index(
+                fields=["has_received_price", "total_price"],
+                condition=LIVE_ROWS,
+                name="order_received_total_idx",
+            ),
+            # Missing money and order inlines of a delivery provider
+            models.Index(
+                fields=["delivery_provider", "has_received_price", "total_price"],
+                condition=LIVE_ROWS,
+                name="order_provider_received_idx",
+            ),
+            # Order inlines of the basket and delivery provider change forms,
+            # paged newest first
+            models.Index(
+                fields=["order_basket", "created_at", "id"],
+                condition=LIVE_ROWS,
+                name="order_basket_created_id_idx",
+            ),
+            models.Index(
+                fields=["delivery_provider", "has_received_price", "created_at", "id"],
+                condition=LIVE_ROWS,
+                name="order_provider_created_id_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"#{self.id}"
 
@@ -78,39 +344,39 @@ class Order(BaseModel):
         if from_delete:
             return super().save(*args, **kwargs)
 
-        old_obj = Order.objects.filter(pk=self.pk).first()
+        old_obj = self.get_original()
+        amount_difference = self.capital_contribution()
         if old_obj:
+            amount_difference -= old_obj.capital_contribution()
 
-            # Instance is being updated
-            old_charge_amount = old_obj.delivery_charge or 0
-            old_total_price = old_obj.total_price if old_obj.has_received_price else 0
-        else:
-            # Instance is being created
-            old_charge_amount = 0
-            old_total_price = 0
-
-        new_charge_amount = self.delivery_charge or 0
-        new_total_price = self.total_price if self.has_received_price else 0
-
-        amount_difference = old_charge_amount - new_charge_amount
-        amount_difference += new_total_price - old_total_price
-
-        # You can now use amount_difference as needed
-        # For example, logging the difference
-        if amount_difference != 0:
-            capital = Capital.objects.get(pk=1)
-            capital.amount += amount_difference
-            capital.save()
-
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Capital.adjust(amount_difference, source=self)
+            OrderDailyRollup.record(old_obj, self)
+            OrderBasket.record_orders([(old_obj, self)])
+            PointsEvent.record(Order, [(old_obj, self)], source=self)
+            invalidate_dashboard()
 
     def delete(self):
-        capital = Capital.objects.get(pk=1)
-        capital.amount += self.delivery_charge or 0
-        capital.amount -= self.total_price if self.has_received_price else 0
-        capital.save()
+        with transaction.atomic():
+            Capital.adjust(
+                -self.capital_contribution(), source=self, reason=CapitalEntryReason.DELETE
+            )
+            OrderDailyRollup.record(self, None)
+            OrderBasket.record_orders([(self, None)])
+            PointsEvent.record(Order, [(self, None)], source=self)
+            invalidate_dashboard()
+            return super().delete()
+
+    def capital_contribution(self):
+        """Money this order adds to the capital, see OrderQuerySet.capital_expression"""
+        return (self.total_price if self.has_received_price else 0) - (
+            self.delivery_charge or 0
+        )
 
-        return super().delete()
+    def earned_points(self):
+        """Points this order earns its customer, see OrderQuerySet.points_expression"""
+        return math.floor(self.total_price)
 
 
 class OrderBasket(BaseModel):
@@ -131,6 +397,19 @@ class OrderBasket(BaseModel):
     )
     notes = models.TextField(null=True, blank=True, max_length=10000)
 
+    # Totals of the live orders in the basket, kept current with F() updates
+    # by the order save/delete hooks and OrderQuerySet, see record_orders
+    orders_count = models.IntegerField(default=0, editable=False)
+    received_orders_count = models.IntegerField(default=0, editable=False)
+    orders_total_price = models.FloatField(default=0, editable=False)
+    orders_delivery_charge = models.FloatField(default=0, editable=False)
+
+    objects = SoftDeleteManager.from_queryset(OrderBasketQuerySet)()
+    all_objects = OrderBasketQuerySet.as_manager()
+    counter_fields = BASKET_ORDER_TOTALS
+    # 1 point for the shipping provider per 100 weight units
+    points_holder = "shipping_provider"
+
     shipping_source = models.ForeignKey(
         "providers.ShippingSource", on_delete=models.CASCADE, null=True, blank=True
     )
@@ -139,6 +418,41 @@ class OrderBasket(BaseModel):
     )
 
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=LIVE_ROWS, name="basket_live_id_idx"),
+            # Newest first, the trailing id keeps keyset pages in index order
+            models.Index(
+                fields=["created_at", "id"],
+                condition=LIVE_ROWS,
+                name="basket_live_created_id_idx",
+            ),
+            models.Index(
+                fields=["shipping_provider", "created_at"],
+                condition=LIVE_ROWS,
+                name="basket_provider_created_idx",
+            ),
+            models.Index(
+                fields=["status", "id"], condition=LIVE_ROWS, name="basket_live_status_idx"
+            ),
+            # Changelist date filters
+            models.Index(
+                fields=["shipped_at"], condition=LIVE_ROWS, name="basket_live_shipped_idx"
+            ),
+            models.Index(
+                fields=["received_at"], condition=LIVE_ROWS, name="basket_live_received_idx"
+            ),
+            # Tracking number search, the expression icontains compares with
+            GinIndex(
+                OpClass(
+                    Upper(Cast("tracking_number", models.TextField())),
+                    name="gin_trgm_ops",
+                ),
+                condition=LIVE_ROWS,
+                name="basket_tracking_trgm_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.shipped_at}"
 
@@ -148,36 +462,392 @@ class OrderBasket(BaseModel):
         if from_delete:
             return super().save(*args, **kwargs)
 
-        old_obj = OrderBasket.objects.filter(pk=self.pk).first()
+        old_obj = self.get_original()
+        amount_difference = self.capital_contribution()
         if old_obj:
-            # Instance is being updated
-            old_amount = (old_obj.total_paid_price or 0) + (
-                old_obj.shipping_charge or 0
+            amount_difference -= old_obj.capital_contribution()
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Capital.adjust(amount_difference, source=self)
+            OrderBasketDailyRollup.record(old_obj, self)
+            PointsEvent.record(OrderBasket, [(old_obj, self)], source=self)
+            invalidate_dashboard()
+
+    def delete(self):
+        with transaction.atomic():
+            Capital.adjust(
+                -self.capital_contribution(), source=self, reason=CapitalEntryReason.DELETE
             )
-            # old_total_price = old_obj.total_price
-        else:
-            # Instance is being created
-            old_amount = 0
-            # old_total_price = 0
+            OrderBasketDailyRollup.record(self, None)
+            PointsEvent.record(OrderBasket, [(self, None)], source=self)
+            invalidate_dashboard()
+            return super().delete()
+
+    def capital_contribution(self):
+        """Money this basket adds to the capital, what was paid for it and its shipping"""
+        return -((self.total_paid_price or 0) + (self.shipping_charge or 0))
+
+    def earned_points(self):
+        """Points this basket earns its shipping provider"""
+        return math.floor((self.items_weight or 0) / 100)
+
+    @staticmethod
+    def add_order_totals(changes, basket_id, sign, values):
+        """Accumulate order totals into changes[basket_id]"""
+        totals = changes.setdefault(basket_id, dict.fromkeys(BASKET_ORDER_TOTALS, 0))
+        for field, value in values.items():
+            totals[field] += sign * (value or 0)
+
+    @classmethod
+    def apply_order_totals(cls, changes):
+        """Add the accumulated changes to their baskets in one UPDATE"""
+        changes = {pk: totals for pk, totals in changes.items() if any(totals.values())}
+        if not changes:
+            return
+        cls.all_objects.filter(pk__in=changes).update(
+            **{
+                field: F(field)
+                + Case(
+                    *(When(pk=pk, then=Value(totals[field])) for pk, totals in changes.items()),
+                    default=Value(0),
+                    output_field=cls._meta.get_field(field),
+                )
+                for field in BASKET_ORDER_TOTALS
+            }
+        )
+
+    @classmethod
+    def record_orders(cls, pairs):
+        """
+        Move the share of the basket order totals of each (old, new) order
+        pair, either may be None when the order is being created or deleted.
+        An order moved to another basket leaves the old one and joins the new one
+        """
+        changes = {}
+        for old, new in pairs:
+            for order, sign in ((old, -1), (new, 1)):
+                if order is None or order.deleted_at is not None:
+                    continue
+                cls.add_order_totals(
+                    changes,
+                    order.order_basket_id,
+                    sign,
+                    {
+                        "orders_count": 1,
+                        "received_orders_count": int(order.has_received_price),
+                        "orders_total_price": order.total_price,
+                        "orders_delivery_charge": order.delivery_charge,
+                    },
+                )
+        cls.apply_order_totals(changes)
+
+    @classmethod
+    def rebuild_order_totals(cls):
+        """Recompute the order totals of every basket from its live orders"""
+        orders = (
+            Order.objects.filter(order_basket=OuterRef("pk"))
+            .order_by()
+            .values("order_basket")
+        )
+
+        def total(field, aggregate):
+            return Coalesce(
+                Subquery(orders.annotate(total=aggregate).values("total")),
+                Value(0),
+                output_field=cls._meta.get_field(field),
+            )
+
+        return cls.all_objects.update(
+            orders_count=total("orders_count", Count("pk")),
+            received_orders_count=total(
+                "received_orders_count", Count("pk", filter=Q(has_received_price=True))
+            ),
+            orders_total_price=total("orders_total_price", Sum("total_price")),
+            orders_delivery_charge=total("orders_delivery_charge", Sum("delivery_charge")),
+        )
 
-        new_amount = (self.total_paid_price or 0) + (self.shipping_charge or 0)
-        # new_total_price = self.total_price
 
-        amount_difference = old_amount - new_amount
-        # amount_difference += new_total_price - old_total_price
+class OrderDailyRollup(BaseRollup):
+    source_model = Order
+    dimensions = ("status", "has_received_price", "delivery_provider_id")
+    metrics = (
+        "total_price",
+        "number_of_items",
+        "delivery_charge",
+        "customer_delivery_charge",
+    )
 
-        # You can now use amount_difference as needed
-        # For example, logging the difference
-        if amount_difference != 0:
-            capital = Capital.objects.get(pk=1)
-            capital.amount += amount_difference
-            capital.save()
+    status = models.CharField(max_length=20, choices=OrderStatus.choices)
+    has_received_price = models.BooleanField()
+    delivery_provider = models.ForeignKey(
+        "providers.DeliveryProvider",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+    )
+    total_price = models.FloatField(default=0)
+    number_of_items = models.IntegerField(default=0)
+    delivery_charge = models.FloatField(default=0)
+    customer_delivery_charge = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "day",
+                "status",
+                "has_received_price",
+                NullKey("delivery_provider"),
+                name="unique_order_daily_rollup",
+            )
+        ]
+
+
+class OrderBasketDailyRollup(BaseRollup):
+    source_model = OrderBasket
+    dimensions = ("status", "shipping_provider_id", "shipping_source_id")
+    metrics = (
+        "total_price",
+        "total_paid_price",
+        "number_of_items",
+        "items_weight",
+        "shipping_charge",
+    )
 
+    status = models.CharField(max_length=20, choices=OrderBasketStatus.choices)
+    shipping_provider = models.ForeignKey(
+        "providers.ShippingProvider", on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    shipping_source = models.ForeignKey(
+        "providers.ShippingSource",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+    )
+    total_price = models.FloatField(default=0)
+    total_paid_price = models.FloatField(default=0)
+    number_of_items = models.IntegerField(default=0)
+    items_weight = models.FloatField(default=0)
+    shipping_charge = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                "day",
+                "status",
+                "shipping_provider",
+                NullKey("shipping_source"),
+                name="unique_order_basket_daily_rollup",
+            )
+        ]
+
+
+class PointsEventReason(models.TextChoices):
+    ACCRUAL = "accrual"
+    RECOMPUTE = "recompute"
+
+
+class PointsEvent(models.Model):
+    """
+    Immutable log row, one per change of a points balance. holder_model and
+    holder_id name the customer or shipping provider whose points changed,
+    source_model and source_id the row that earned them
+    """
+
+    holder_model = models.CharField(max_length=100)
+    holder_id = models.BigIntegerField()
+    source_model = models.CharField(max_length=100)
+    source_id = models.BigIntegerField(null=True, blank=True)
+    delta = models.IntegerField()
+    reason = models.CharField(
+        max_length=20,
+        choices=PointsEventReason.choices,
+        default=PointsEventReason.ACCRUAL,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["holder_model", "holder_id", "created_at"])]
+
+    def __str__(self):
+        return f"{self.holder_model} #{self.holder_id} {self.delta:+} points"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Points events are immutable")
         super().save(*args, **kwargs)
 
-    def delete(self):
-        capital = Capital.objects.get(pk=1)
-        capital.amount += (self.total_paid_price or 0) + (self.shipping_charge or 0)
-        capital.save()
+    def delete(self, *args, **kwargs):
+        raise ValueError("Points events are immutable")
+
+    @staticmethod
+    def add_points(deltas, holder_id, points):
+        if holder_id is not None:
+            deltas[holder_id] = deltas.get(holder_id, 0) + points
+
+    @classmethod
+    def record(cls, model, pairs, source=None):
+        """
+        Move the points of each (old, new) pair of model rows from the old
+        holder to the new one, either may be None when the row is being
+        created or deleted
+        """
+        holder = model._meta.get_field(model.points_holder).attname
+        deltas = {}
+        for old, new in pairs:
+            for obj, sign in ((old, -1), (new, 1)):
+                if obj is not None and obj.deleted_at is None:
+                    cls.add_points(deltas, getattr(obj, holder), sign * obj.earned_points())
+        cls.award(model, deltas, source=source)
+
+    @classmethod
+    def log(cls, model, deltas, source=None, reason=PointsEventReason.ACCRUAL):
+        """Log one event per holder of model rows in deltas[holder pk]"""
+        holder_model = model._meta.get_field(model.points_holder).related_model
+        cls.objects.bulk_create(
+            cls(
+                holder_model=holder_model._meta.label_lower,
+                holder_id=pk,
+                source_model=model._meta.label_lower,
+                source_id=source.pk if isinstance(source, models.Model) else None,
+                delta=delta,
+                reason=reason,
+            )
+            for pk, delta in deltas.items()
+        )
+
+    @classmethod
+    def award(cls, model, deltas, source=None, reason=PointsEventReason.ACCRUAL):
+        """
+        Add deltas[holder pk] points to the holders of model rows with a
+        single atomic F() increment, so concurrent changes never lose points,
+        and log one event per holder
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        holder_model = model._meta.get_field(model.points_holder).related_model
+        with transaction.atomic():
+            cls.log(model, deltas, source=source, reason=reason)
+            holder_model._base_manager.filter(pk__in=deltas).update(
+                points=F("points")
+                + Case(
+                    *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+                    default=Value(0),
+                )
+            )
+
+    @classmethod
+    def recompute(cls, model):
+        """
+        Set the points of every holder to what the live rows of model earn
+        with one UPDATE from a grouped subquery, and log the corrections.
+        The holders stay locked from the read of their old points to the
+        update, so an accrual cannot land in between and be counted twice.
+        Returns the number of holders whose points were corrected
+        """
+        holder = model._meta.get_field(model.points_holder)
+        holders = holder.related_model._base_manager.all()
+        earned = (
+            model.objects.points_by_holder()
+            .filter(**{holder.attname: OuterRef("pk")})
+            .values("points")
+        )
+        with transaction.atomic():
+            before = dict(holders.select_for_update().values_list("pk", "points"))
+            holders.update(points=Coalesce(Subquery(earned), Value(0)))
+            deltas = {
+                pk: points - before.get(pk, 0)
+                for pk, points in holders.values_list("pk", "points")
+                if points != before.get(pk, 0)
+            }
+            cls.log(model, deltas, reason=PointsEventReason.RECOMPUTE)
+        return len(deltas)
+
+
+class ReportJobKind(models.TextChoices):
+    ORDERS = "orders"
+    ORDER_BASKETS = "order_baskets"
 
-        return super().delete()
+
+class ReportJobStatus(models.TextChoices):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReportJob(models.Model):
+    """
+    A PDF report rendered in the background, see orders.jobs
+    """
+
+    kind = models.CharField(max_length=20, choices=ReportJobKind.choices)
+    status = models.CharField(
+        max_length=20, choices=ReportJobStatus.choices, default=ReportJobStatus.PENDING
+    )
+    object_ids = models.JSONField(default=list)
+    file_path = models.CharField(max_length=255, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"#{self.id} {self.kind} ({self.status})"
+
+    @property
+    def queued_seconds(self):
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.created_at).total_seconds()
+
+    @property
+    def run_seconds(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+
+def _selection_token():
+    return secrets.token_urlsafe(12)
+
+
+class ReportSelection(models.Model):
+    """
+    Ids picked in an admin changelist, saved server side so the PDF URL
+    only carries a short token. Selections expire after REPORT_SELECTION_TTL seconds
+    """
+
+    token = models.CharField(max_length=32, unique=True, default=_selection_token)
+    kind = models.CharField(max_length=20, choices=ReportJobKind.choices)
+    object_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    @classmethod
+    def _expired_before(cls):
+        return timezone.now() - timedelta(seconds=settings.REPORT_SELECTION_TTL)
+
+    @classmethod
+    def create_for(cls, kind, queryset):
+        cls.objects.filter(created_at__lt=cls._expired_before()).delete()
+        return cls.objects.create(
+            kind=kind, object_ids=list(queryset.values_list("id", flat=True))
+        )
+
+    @classmethod
+    def resolve(cls, token, kind):
+        """Return the saved ids, or None for unknown or expired tokens"""
+        return (
+            cls.objects.filter(
+                token=token, kind=kind, created_at__gte=cls._expired_before()
+            )
+            .values_list("object_ids", flat=True)
+            .first()
+        )
@@ -0,0 +1,182 @@
+import logging
+import re
+import threading
+import time
+from functools import lru_cache
+
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import TableStyle
+
+logger = logging.getLogger(__name__)
+
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+BOLD_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+# Hebrew, Arabic, Syriac, Thaana, NKo and the Arabic presentation forms
+RTL_CHARACTERS = re.compile("[\u0590-\u08ff\ufb1d-\ufdff\ufe70-\ufeff]")
+ARABIC_TEXT_CACHE_SIZE = 4096
+
+_lock = threading.Lock()
+_resources = None
+
+
+def register_fonts():
+    """
+    Register fonts that support Arabic text
+    """
+    try:
+        # Register DejaVu Sans which supports Arabic
+        pdfmetrics.registerFont(TTFont("DejaVuSans", FONT_PATH))
+        pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", BOLD_FONT_PATH))
+        return True
+    except Exception as e:
+        logger.warning("Could not register Arabic font: %s", e)
+        return False
+
+
+class PdfResources:
+    """
+    Fonts and styles shared by every PDF report of the process
+    """
+
+    def __init__(self):
+        started = time.perf_counter()
+
+        self.arabic_font_available = register_fonts()
+        self.font = "DejaVuSans" if self.arabic_font_available else "Helvetica"
+        self.bold_font = (
+            "DejaVuSans-Bold" if self.arabic_font_available else "Helvetica-Bold"
+        )
+
+        self.styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle(
+            "CustomTitle",
+            parent=self.styles["Heading1"],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue,
+        )
+        self.heading_style = ParagraphStyle(
+            "CustomHeading",
+            parent=self.styles["Heading2"],
+            fontSize=16,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor=colors.darkblue,
+        )
+
+        self.summary_table_style = TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (0, -1), self.bold_font),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+            ("GRID", (0, 0), (-1, -1), 1, colors.lightgrey),
+        ])
+        self.info_table_style = TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (0, -1), self.bold_font),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ])
+        self.data_table_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, 0), self.bold_font),
+            ("FONTNAME", (0, 1), (-1, -1), self.font),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ("GRID", (0, 0), (-1, -1), 1, colors.black),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.beige, colors.lightgrey]),
+        ])
+        self.detail_table_style = TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (0, -1), self.bold_font),
+            ("FONTNAME", (0, 0), (1, -1), self.font),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+        ])
+
+        self.load_time = time.perf_counter() - started
+
+
+def get_pdf_resources():
+    """
+    Load the shared PDF resources on first use, later calls are free
+    """
+    global _resources
+    if _resources is None:
+        with _lock:
+            if _resources is None:
+                _resources = PdfResources()
+                logger.info(
+                    "PDF resources loaded in %.3fs", _resources.load_time
+                )
+    return _resources
+
+
+def warm_up_pdf_resources():
+    """Load the PDF resources ahead of the first request, e.g. at WSGI startup"""
+    return get_pdf_resources().load_time
+
+
+@lru_cache(maxsize=ARABIC_TEXT_CACHE_SIZE)
+def _shape_arabic_text(text):
+    # Reshape Arabic text to connect letters properly
+    reshaped_text = arabic_reshaper.reshape(text)
+
+    # Apply bidirectional algorithm for proper text direction
+    return get_display(reshaped_text)
+
+
+def process_arabic_text(text):
+    """
+    Process Arabic text for proper display in PDF by reshaping and applying bidirectional algorithm.
+    Text without right-to-left characters is returned as is, shaped strings are memoized
+    """
+    if not text or not isinstance(text, str):
+        return text
+
+    if not RTL_CHARACTERS.search(text):
+        return text
+
+    return _shape_arabic_text(text)
+
+
+def process_arabic_texts(texts):
+    """Shape a list of strings at once, see process_arabic_text"""
+    return [process_arabic_text(text) for text in texts]
+
+
+def get_arabic_text_cache_stats():
+    info = _shape_arabic_text.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0,
+    }
+
+
+def log_arabic_text_cache_stats():
+    stats = get_arabic_text_cache_stats()
+    logger.info(
+        "Arabic text cache: %d hits, %d misses (%.0f%% hit rate), %d of %d entries",
+        stats["hits"],
+        stats["misses"],
+        stats["hit_rate"] * 100,
+        stats["size"],
+        stats["max_size"],
+    )
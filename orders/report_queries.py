@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from django.db.models import Sum
+
+from orders.models import Order, OrderBasket, OrderDailyRollup
+from providers.models import DeliveryProvider
+from utils.explain import report_query
+
+
+def _last_30_days():
+    date_to = datetime.today()
+    return date_to - timedelta(days=30), date_to
+
+
+def _some_pk(model):
+    return model.objects.values_list("pk", flat=True).first() or 0
+
+
+@report_query("range_summary_page")
+def range_summary_page():
+    date_from, date_to = _last_30_days()
+    return Order.objects.filter(
+        created_at__gte=date_from, created_at__lte=date_to
+    ).order_by("-created_at", "-id")[:25]
+
+
+@report_query("range_summary_totals")
+def range_summary_totals():
+    date_from, date_to = _last_30_days()
+    return OrderDailyRollup.objects.filter(
+        day__gte=date_from.date(), day__lte=date_to.date()
+    ).values("day").annotate(total_price=Sum("total_price"))
+
+
+@report_query("overview_missing_money")
+def overview_missing_money():
+    return (
+        OrderDailyRollup.objects.filter(has_received_price=False)
+        .values("has_received_price")
+        .annotate(r=Sum("total_price"))
+    )
+
+
+@report_query("order_changelist_status")
+def order_changelist_status():
+    return Order.objects.filter(status="pending").order_by("-id")[:25]
+
+
+@report_query("delivery_provider_missing_money")
+def delivery_provider_missing_money():
+    return (
+        Order.objects.filter(
+            delivery_provider_id=_some_pk(DeliveryProvider),
+            has_received_price=False,
+        )
+        .values("delivery_provider")
+        .annotate(r=Sum("total_price"))
+    )
+
+
+@report_query("basket_completion_check")
+def basket_completion_check():
+    # complete_received() as the order admin runs it after a save
+    return OrderBasket.objects.filter(pk=_some_pk(OrderBasket)).ready_to_complete()
+
+
+@report_query("basket_changelist_shipped")
+def basket_changelist_shipped():
+    date_from, date_to = _last_30_days()
+    return OrderBasket.objects.filter(
+        shipped_at__gte=date_from, shipped_at__lt=date_to
+    ).order_by("-id")[:25]
+
+
+@report_query("basket_changelist_status")
+def basket_changelist_status():
+    return OrderBasket.objects.filter(status="shipping").order_by("-id")[:25]
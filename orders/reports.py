@@ -0,0 +1,334 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+import io
+import os
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+from reportlab.lib.units import inch
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from utils.processes import close_idle_connections, setup_django
+
+from .models import Order, OrderBasket
+from .pdf import get_pdf_resources, log_arabic_text_cache_stats, process_arabic_texts
+
+REPORT_CHUNK_SIZE = 500
+
+
+def get_report_baskets(basket_ids):
+    return OrderBasket.objects.filter(id__in=basket_ids).prefetch_related(
+        Prefetch('order_set', to_attr='orders')
+    ).order_by('id')
+
+
+def get_report_orders(order_ids):
+    return Order.objects.filter(id__in=order_ids).select_related(
+        'customer', 'order_basket', 'delivery_provider'
+    ).order_by('id')
+
+
+def build_order_baskets_pdf(baskets, output):
+    """
+    Lay out the order baskets summary report into the output file.
+    Baskets must have their orders prefetched into `orders`
+    """
+    # Fonts and styles are loaded once per process
+    pdf = get_pdf_resources()
+    
+    # Create the PDF document
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    story = []
+    
+    styles = pdf.styles
+    title_style = pdf.title_style
+    heading_style = pdf.heading_style
+    
+    # Title
+    story.append(Paragraph("Order Baskets Summary Report", title_style))
+    story.append(Spacer(1, 20))
+    
+    # Read the baskets once with a chunked cursor, the report walks them several times
+    baskets = list(baskets.iterator(chunk_size=REPORT_CHUNK_SIZE))
+    
+    # Summary statistics
+    total_baskets = len(baskets)
+    total_orders = sum([basket.orders_count for basket in baskets])
+    total_amount = sum([basket.total_price for basket in baskets])
+    
+    story.append(Paragraph("Summary Statistics", heading_style))
+    
+    summary_data = [
+        ['Total Baskets:', str(total_baskets)],
+        ['Total Orders:', str(total_orders)],
+        ['Total Amount:', f'${total_amount:.2f}'],
+        ['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
+    summary_table.setStyle(pdf.summary_table_style)
+    
+    story.append(summary_table)
+    story.append(Spacer(1, 30))
+    
+    # Detailed basket information
+    story.append(Paragraph("Basket Details", heading_style))
+    
+    for basket in baskets:
+        # Basket header
+        basket_title = f"Basket #{basket.id}"
+        story.append(Paragraph(basket_title, styles['Heading3']))
+        
+        # Basket info
+        basket_info = [
+            ['Created:', basket.created_at.strftime('%Y-%m-%d %H:%M')],
+            ['Orders Count:', str(basket.orders_count)],
+            ['Total Price:', f'${basket.total_price:.2f}'],
+        ]
+        
+        basket_info_table = Table(basket_info, colWidths=[1.5*inch, 2*inch])
+        basket_info_table.setStyle(pdf.info_table_style)
+        
+        story.append(basket_info_table)
+        story.append(Spacer(1, 10))
+        
+        # Orders in this basket
+        if len(basket.orders) > 0:
+            story.append(Paragraph("Orders:", styles['Heading4']))
+            
+            order_data = [['Order ID', 'Items Link', 'Quantity', 'Price', 'Status']]
+            
+            for order in basket.orders:
+                order_data.append([
+                    str(order.id),
+                    order.items_link if order.items_link else 'N/A',
+                    str(order.number_of_items),
+                    f'${order.total_price:.2f}',
+                    order.status
+                ])
+            
+            order_table = Table(order_data, colWidths=[0.8*inch, 2.5*inch, 0.8*inch, 0.8*inch, 1*inch])
+            order_table.setStyle(pdf.data_table_style)
+            
+            story.append(order_table)
+        
+        story.append(Spacer(1, 20))
+    
+    # Build the PDF
+    doc.build(story)
+    log_arabic_text_cache_stats()
+
+
+def _orders_summary_story(pdf, orders):
+    story = []
+    
+    # Title
+    story.append(Paragraph("Orders Summary Report", pdf.title_style))
+    story.append(Spacer(1, 20))
+    
+    # Summary statistics
+    total_orders = len(orders)
+    total_amount = sum([order.total_price for order in orders])
+    total_items = sum([order.number_of_items for order in orders])
+    total_delivery_charges = sum([order.delivery_charge or 0 for order in orders])
+    
+    story.append(Paragraph("Summary Statistics", pdf.heading_style))
+    
+    summary_data = [
+        ['Total Orders:', str(total_orders)],
+        ['Total Items:', str(total_items)],
+        ['Total Amount:', f'${total_amount:.2f}'],
+        ['Total Delivery Charges:', f'${total_delivery_charges:.2f}'],
+        ['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+    ]
+    
+    summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
+    summary_table.setStyle(pdf.summary_table_style)
+    
+    story.append(summary_table)
+    story.append(Spacer(1, 30))
+    
+    # Detailed order information
+    story.append(Paragraph("Order Details", pdf.heading_style))
+    return story
+
+
+def _orders_table_story(pdf, orders):
+    # Create table with order data
+    order_data = [['Order ID', 'Customer', 'Bill ID', 'Status', 'Items', 'Total Price', 'Delivery Charge', 'Created At']]
+    
+    processed_names = process_arabic_texts([order.customer.full_name for order in orders])
+    
+    for order, processed_customer_name in zip(orders, processed_names):
+        order_data.append([
+            str(order.id),
+            processed_customer_name,
+            order.bill_id if order.bill_id else 'N/A',
+            order.get_status_display(),
+            str(order.number_of_items),
+            f'${order.total_price:.2f}',
+            f'${order.delivery_charge:.2f}' if order.delivery_charge else '$0.00',
+            order.created_at.strftime('%Y-%m-%d %H:%M')
+        ])
+    
+    order_table = Table(
+        order_data,
+        colWidths=[0.7*inch, 1.5*inch, 0.8*inch, 0.8*inch, 0.6*inch, 0.8*inch, 0.8*inch, 1.1*inch],
+        repeatRows=1,
+    )
+    order_table.setStyle(pdf.data_table_style)
+    
+    return [order_table, Spacer(1, 30)]
+
+
+def _order_details_story(pdf, orders, with_heading=True):
+    story = []
+    
+    # Order details breakdown
+    if with_heading:
+        story.append(Paragraph("Individual Order Information", pdf.heading_style))
+    
+    processed_names = process_arabic_texts([order.customer.full_name for order in orders])
+    processed_addresses = process_arabic_texts([order.customer.address for order in orders])
+    
+    for order, processed_customer_name, processed_address in zip(orders, processed_names, processed_addresses):
+        # Order header
+        order_title = f"Order #{order.id}"
+        story.append(Paragraph(order_title, pdf.styles['Heading3']))
+        
+        order_info = [
+            ['Shippier:', 'Finders - Shop And Ship'],
+            ['Customer:', processed_customer_name],
+            ['Note:', order.notes if order.notes else '-'],
+            ['Tel:', order.customer.phone_number if order.customer else '-'],
+            ['Address:', processed_address],
+            ['Price:', f'${((order.total_price or 0) + (order.delivery_charge or 0)):.2f}'],
+        ]
+        
+        if order.notes:
+            order_info.append(['Notes:', order.notes[:100] + '...' if len(order.notes) > 100 else order.notes])
+        
+        order_info_table = Table(order_info, colWidths=[2*inch, 3*inch])
+        order_info_table.setStyle(pdf.detail_table_style)
+        
+        story.append(order_info_table)
+        story.append(Spacer(1, 20))
+    
+    return story
+
+
+def _draw_page_number(canvas, page_number):
+    canvas.saveState()
+    canvas.setFont('Helvetica', 8)
+    canvas.drawRightString(A4[0] - 0.75*inch, 0.5*inch, f"Page {page_number}")
+    canvas.restoreState()
+
+
+def _number_pages(canvas, doc):
+    _draw_page_number(canvas, canvas.getPageNumber())
+
+
+def build_orders_pdf(orders, output):
+    """
+    Lay out the orders summary report into the output file
+    """
+    # Fonts and styles are loaded once per process
+    pdf = get_pdf_resources()
+    
+    orders = list(orders)
+    
+    # Create the PDF document
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    story = _orders_summary_story(pdf, orders)
+    story += _orders_table_story(pdf, orders)
+    story += _order_details_story(pdf, orders)
+    
+    # Build the PDF
+    doc.build(story, onFirstPage=_number_pages, onLaterPages=_number_pages)
+
+
+def _render_orders_part(part, orders):
+    """
+    Render one part of the orders report to PDF bytes
+    """
+    pdf = get_pdf_resources()
+    if part == 'summary':
+        story = _orders_summary_story(pdf, orders)
+    elif part == 'table':
+        story = _orders_table_story(pdf, orders)
+    else:
+        story = _order_details_story(pdf, orders, with_heading=part == 'details_head')
+    
+    output = io.BytesIO()
+    SimpleDocTemplate(output, pagesize=A4).build(story)
+    return output.getvalue()
+
+
+def build_orders_pdf_parallel(orders, output, chunk_size=None, workers=None):
+    """
+    Lay out the orders summary report in chunks rendered by a process pool,
+    then merge the parts in order and number the merged pages.
+    Every chunk starts on a new page
+    """
+    chunk_size = chunk_size or settings.PDF_CHUNK_SIZE
+    workers = workers or settings.PDF_WORKERS
+    
+    get_pdf_resources()
+    orders = list(orders)
+    chunks = [orders[i:i + chunk_size] for i in range(0, len(orders), chunk_size)]
+    
+    parts = [('table', chunk) for chunk in chunks]
+    parts += [
+        ('details_head' if i == 0 else 'details', chunk) for i, chunk in enumerate(chunks)
+    ]
+    
+    # Workers come from a fork server rather than from this process, which
+    # runs request and job threads whose locks a fork could copy mid-use.
+    # They set Django up themselves and never share this process's database
+    # connections. The idle ones are closed here so no socket is handed
+    # down either.
+    # The summary needs every order and is rendered here while the chunks
+    # are in flight
+    close_idle_connections()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context('forkserver'),
+        initializer=setup_django,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'finders.settings'),),
+    ) as executor:
+        chunk_parts = executor.map(_render_orders_part, *zip(*parts))
+        rendered = [_render_orders_part('summary', orders)] + list(chunk_parts)
+    
+    writer = PdfWriter()
+    for part in rendered:
+        writer.append(PdfReader(io.BytesIO(part)))
+    
+    # Number the pages of the merged document with a one page overlay each
+    overlay_buffer = io.BytesIO()
+    overlay = canvas.Canvas(overlay_buffer, pagesize=A4)
+    for page_number in range(1, len(writer.pages) + 1):
+        _draw_page_number(overlay, page_number)
+        overlay.showPage()
+    overlay.save()
+    overlay_buffer.seek(0)
+    for page, overlay_page in zip(writer.pages, PdfReader(overlay_buffer).pages):
+        page.merge_page(overlay_page)
+    
+    writer.write(output)
+
+
+def build_orders_report(orders, output):
+    """
+    Lay out the orders summary report, in parallel chunks for large selections
+    """
+    orders = list(orders.iterator(chunk_size=REPORT_CHUNK_SIZE))
+    if len(orders) > settings.PDF_PARALLEL_THRESHOLD and settings.PDF_WORKERS > 1:
+        build_orders_pdf_parallel(orders, output)
+    else:
+        build_orders_pdf(orders, output)
+    log_arabic_text_cache_stats()
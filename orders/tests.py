@@ -1,3 +1,1103 @@
-from django.test import TestCase
+import csv
+import os
+import re
+import runpy
+import tempfile
+import threading
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import openpyxl
+from pypdf import PdfReader
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+import finders.settings
+from customers.models import Customer
+from expenses.models import Capital
+from orders.benchmarks import run_benchmarks
+from orders.exports import parquet_available
+from orders.jobs import REPORT_BUILDERS, claim_next_job, run_job
+from orders.management.commands.explain_report_queries import (
+    Command as ExplainReportQueriesCommand,
+)
+from orders.models import (
+    Order,
+    OrderBasket,
+    OrderBasketQuerySet,
+    OrderBasketStatus,
+    OrderDailyRollup,
+    PointsEvent,
+    PointsEventReason,
+    ReportJob,
+    ReportJobKind,
+    ReportJobStatus,
+    ReportSelection,
+)
+from orders.pdf import (
+    PdfResources,
+    _shape_arabic_text,
+    get_arabic_text_cache_stats,
+    get_pdf_resources,
+    process_arabic_text,
+    process_arabic_texts,
+)
+from orders.reports import (
+    build_orders_pdf,
+    build_orders_pdf_parallel,
+    get_report_orders,
+)
+from providers.models import DeliveryProvider, ShippingProvider, ShippingSource
+from utils.autocomplete import _generation_key, autocomplete_targets
+from utils.explain import find_sequential_scans
+from utils.pagination import KeysetPaginator
+from utils.profiling import history, profile_block
+from utils.testing import (
+    AdminTestCase,
+    create_basket,
+    create_customer,
+    create_orders,
+    create_shipping_provider,
+)
+
+
+class ChangelistQueryCountTests(AdminTestCase):
+    """The admin changelists must not fetch related rows once per row"""
+
+    def setUp(self):
+        super().setUp()
+        self.source = ShippingSource.objects.create(name="Source")
+        self.created = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.created += 1
+            n = self.created
+            delivery_provider = DeliveryProvider.objects.create(
+                name=f"Delivery {n}", phone_number=str(n)
+            )
+            basket = create_basket(
+                create_shipping_provider(f"Shipping {n}"), shipping_source=self.source
+            )
+            create_orders(
+                1,
+                create_customer(f"Customer {n}"),
+                basket,
+                delivery_provider=delivery_provider,
+            )
+
+    def count_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, url_name):
+        self.add_rows(2)
+        few = self.count_queries(url_name)
+        self.add_rows(8)
+        self.assertEqual(self.count_queries(url_name), few)
+
+    def test_order_changelist(self):
+        self.assertConstantQueries("admin:orders_order_changelist")
+
+    def test_order_basket_changelist(self):
+        self.assertConstantQueries("admin:orders_orderbasket_changelist")
+
+    def test_delivery_provider_changelist(self):
+        self.assertConstantQueries("admin:providers_deliveryprovider_changelist")
+
+    def test_delivery_provider_orders_count_skips_deleted(self):
+        self.add_rows(1)
+        delivery_provider = DeliveryProvider.objects.get()
+        create_orders(
+            2,
+            create_customer(),
+            create_basket(),
+            delivery_provider=delivery_provider,
+            deleted_at=timezone.now(),
+        )
+        response = self.client.get(reverse("admin:providers_deliveryprovider_changelist"))
+        [row] = response.context["cl"].result_list
+        self.assertEqual(row.orders_count, 1)
+
+    def test_change_form_skips_list_columns(self):
+        self.add_rows(1)
+        delivery_provider = DeliveryProvider.objects.get()
+        url = reverse(
+            "admin:providers_deliveryprovider_change", args=[delivery_provider.pk]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(hasattr(response.context["original"], "orders_count"))
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+
+class BenchmarkSuiteTests(TestCase):
+    """The benchmark suite runs end to end on a small synthetic dataset"""
+
+    def test_generate_and_run(self):
+        call_command("generate_synthetic_data", orders=60, stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 60)
+        self.assertEqual(OrderBasket.objects.count(), 6)
+        self.assertGreater(Order.objects.dates("created_at", "day").count(), 1)
+        self.assertEqual(
+            OrderDailyRollup.objects.aggregate(r=Sum("row_count"))["r"], 60
+        )
+        self.assertTrue(Order._meta.get_field("created_at").auto_now_add)
+
+        results = run_benchmarks(repeat=1, pdf_size=5)
+        self.assertEqual(
+            {name: result["status"] for name, result in results.items()},
+            dict.fromkeys(results, 200),
+        )
+
+
+class TrackedValuesTests(TestCase):
+    """Saves diff against the values the row was loaded with"""
+
+    def setUp(self):
+        self.order = Order.objects.create(
+            total_price=10,
+            number_of_items=1,
+            delivery_charge=2,
+            customer=create_customer(),
+            order_basket=create_basket(),
+        )
+
+    def test_save_does_not_reload_the_row(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.has_received_price = True
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        self.assertFalse(
+            any(
+                query["sql"].startswith("SELECT") and '"orders_order"' in query["sql"]
+                for query in queries
+            )
+        )
+        self.assertEqual(Capital.load().amount, 8)
+
+    def test_successive_saves_diff_against_the_last_save(self):
+        order = Order.objects.get(pk=self.order.pk)
+        order.delivery_charge = 5
+        order.save()
+        order.delivery_charge = 1
+        order.save()
+        self.assertEqual(order.get_original().delivery_charge, 1)
+        self.assertEqual(Capital.load().amount, -1)
+
+
+class BulkAccountingTests(TestCase):
+    """Bulk updates and deletes keep the capital and rollups equal to per-row saves"""
+
+    def setUp(self):
+        basket = create_basket(total_price=100, shipping_charge=3)
+        create_orders(20, create_customer(), basket, delivery_charge=1)
+
+    def assertCapitalMatchesRows(self):
+        expected = sum(
+            obj.capital_contribution()
+            for model in (Order, OrderBasket)
+            for obj in model.objects.filter(deleted_at__isnull=True)
+        )
+        self.assertAlmostEqual(Capital.load().amount, expected)
+        self.assertEqual(
+            OrderDailyRollup.objects.aggregate(r=Sum("row_count"))["r"],
+            Order.objects.filter(deleted_at__isnull=True).count(),
+        )
+
+    def test_bulk_create(self):
+        self.assertCapitalMatchesRows()
+
+    def test_update(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:5]).update(
+            has_received_price=True, status="delivered"
+        )
+        self.assertCapitalMatchesRows()
+        self.assertEqual(
+            OrderDailyRollup.objects.get(status="delivered").row_count, 5
+        )
+
+    def test_update_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            Order.objects.update(delivery_charge=2)
+        self.assertLess(len(queries), 15)
+        self.assertCapitalMatchesRows()
+
+    @skipUnlessDBFeature("has_select_for_update_of")
+    def test_update_locks_rows_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            Order.objects.update(delivery_charge=2)
+        locks = [query["sql"] for query in queries if "FOR UPDATE" in query["sql"]]
+        self.assertEqual(len(locks), 1)
+        self.assertIn('"orders_order"', locks[0])
+
+    def test_querysets_must_define_accounting(self):
+        with self.assertRaisesMessage(TypeError, "must define points_expression"):
+
+            class IncompleteQuerySet(OrderBasketQuerySet):
+                points_expression = None
+
+    def test_delete_is_soft(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:5]).delete()
+        self.assertEqual(Order.objects.filter(deleted_at__isnull=True).count(), 15)
+        self.assertCapitalMatchesRows()
+
+    def test_deleted_rows_are_hidden_and_restorable(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:5]).delete()
+        self.assertEqual(Order.objects.count(), 15)
+        self.assertEqual(Order.all_objects.count(), 20)
+        self.assertEqual(Order.all_objects.restore(), 5)
+        self.assertEqual(Order.objects.count(), 20)
+        self.assertCapitalMatchesRows()
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages cover the ordering once, in both directions"""
+
+    def setUp(self):
+        # Bulk created rows share created_at, so pages hinge on the id tiebreak
+        create_orders(30, create_customer(), create_basket())
+        self.queryset = Order.objects.order_by("-created_at", "-id")
+        self.ids = list(self.queryset.values_list("id", flat=True))
+
+    def test_walks_forward_and_back(self):
+        pages, cursor = [], None
+        while True:
+            page = KeysetPaginator(self.queryset, 10, cursor=cursor).page()
+            pages.append([order.id for order in page])
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(pages, [self.ids[:10], self.ids[10:20], self.ids[20:]])
+
+        page = KeysetPaginator(self.queryset, 10, cursor=page.previous_cursor).page()
+        self.assertEqual([order.id for order in page], self.ids[10:20])
+        self.assertTrue(page.has_previous())
+
+    def test_invalid_cursor_starts_over(self):
+        page = KeysetPaginator(self.queryset, 10, cursor="not-a-cursor").page()
+        self.assertEqual([order.id for order in page], self.ids[:10])
+        self.assertFalse(page.has_previous())
+
+    def test_changelist_follows_cursor(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "pw")
+        )
+        url = reverse("admin:orders_order_changelist")
+        response = self.client.get(url, {"o": "-1"})
+        cursor = response.context["cl"].paginator.current_page.next_cursor
+        response = self.client.get(url, {"o": "-1", "cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [order.id for order in response.context["cl"].result_list], self.ids[25:]
+        )
+
+
+class BasketOrderTotalsTests(TestCase):
+    """The order totals stored on baskets follow every kind of order change"""
+
+    def setUp(self):
+        shipping_provider = create_shipping_provider()
+        self.baskets = [create_basket(shipping_provider) for _ in range(2)]
+        create_orders(4, create_customer(), self.baskets[0], delivery_charge=1)
+
+    def assertTotalsMatchOrders(self):
+        for basket in OrderBasket.objects.all():
+            orders = Order.objects.filter(order_basket=basket)
+            self.assertEqual(
+                (
+                    basket.orders_count,
+                    basket.received_orders_count,
+                    basket.orders_total_price,
+                    basket.orders_delivery_charge,
+                ),
+                (
+                    orders.count(),
+                    orders.filter(has_received_price=True).count(),
+                    orders.aggregate(r=Sum("total_price"))["r"] or 0,
+                    orders.aggregate(r=Sum("delivery_charge"))["r"] or 0,
+                ),
+            )
+
+    def test_bulk_create(self):
+        self.assertEqual(OrderBasket.objects.get(pk=self.baskets[0].pk).orders_count, 4)
+        self.assertTotalsMatchOrders()
+
+    def test_save_moves_order_between_baskets(self):
+        order = Order.objects.first()
+        order.order_basket = self.baskets[1]
+        order.has_received_price = True
+        order.save()
+        self.assertTotalsMatchOrders()
+
+    def test_update_and_delete(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:2]).update(
+            total_price=7, has_received_price=True
+        )
+        self.assertTotalsMatchOrders()
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:1]).delete()
+        self.assertTotalsMatchOrders()
+        Order.all_objects.restore()
+        self.assertTotalsMatchOrders()
+
+    def test_stale_basket_save_keeps_totals(self):
+        basket = OrderBasket.objects.get(pk=self.baskets[0].pk)
+        Order.objects.update(has_received_price=True)
+        basket.notes = "Checked"
+        basket.save()
+        self.assertTotalsMatchOrders()
+
+    def test_completion(self):
+        self.assertEqual(OrderBasket.objects.complete_received(), 1)
+        Order.objects.update(has_received_price=True)
+        self.assertEqual(OrderBasket.objects.complete_received(), 1)
+        self.assertEqual(
+            OrderBasket.objects.get(pk=self.baskets[0].pk).status,
+            OrderBasketStatus.COMPLETED,
+        )
+
+    def test_rebuild(self):
+        OrderBasket.objects.update(orders_count=0, orders_total_price=0)
+        call_command("reconcile_basket_totals", stdout=StringIO())
+        self.assertTotalsMatchOrders()
+
+
+class PointsTests(TestCase):
+    """Points follow order and basket changes made anywhere, not just in the admin"""
+
+    def setUp(self):
+        self.shipping_provider = create_shipping_provider()
+        self.basket = create_basket(self.shipping_provider, items_weight=250)
+        self.customers = [create_customer(f"Customer {n}") for n in range(2)]
+        create_orders(3, self.customers[0], self.basket, total_price=10.5)
+
+    def points(self, holder):
+        return type(holder)._base_manager.get(pk=holder.pk).points
+
+    def test_accrual(self):
+        self.assertEqual(self.points(self.customers[0]), 30)
+        self.assertEqual(self.points(self.shipping_provider), 2)
+
+    def test_bulk_update_moves_points(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:1]).update(
+            customer=self.customers[1], total_price=7
+        )
+        self.assertEqual(self.points(self.customers[0]), 20)
+        self.assertEqual(self.points(self.customers[1]), 7)
+        Order.objects.filter(customer=self.customers[1]).delete()
+        self.assertEqual(self.points(self.customers[1]), 0)
+
+    def test_stale_customer_save_keeps_points(self):
+        customer = Customer.objects.get(pk=self.customers[0].pk)
+        Order.objects.create(
+            total_price=5, number_of_items=1, customer=customer, order_basket=self.basket
+        )
+        customer.address = "Somewhere"
+        customer.save()
+        self.assertEqual(self.points(customer), 35)
+
+    def test_events_are_logged(self):
+        order = Order.objects.first()
+        order.total_price = 20
+        order.save()
+        event = PointsEvent.objects.latest("pk")
+        self.assertEqual(
+            (event.holder_model, event.holder_id, event.source_id, event.delta),
+            ("customers.customer", self.customers[0].pk, order.pk, 10),
+        )
+
+    def test_recompute(self):
+        Customer.objects.update(points=0)
+        ShippingProvider.objects.update(points=0)
+        call_command("recompute_points", stdout=StringIO())
+        self.assertEqual(self.points(self.customers[0]), 30)
+        self.assertEqual(self.points(self.shipping_provider), 2)
+        self.assertEqual(
+            PointsEvent.objects.filter(reason=PointsEventReason.RECOMPUTE).count(), 2
+        )
+
+    def test_recompute_logs_corrections_only(self):
+        Customer.objects.filter(pk=self.customers[0].pk).update(points=25)
+        Customer.objects.filter(pk=self.customers[1].pk).update(points=4)
+        self.assertEqual(PointsEvent.recompute(Order), 2)
+        self.assertEqual(
+            sorted(
+                PointsEvent.objects.filter(reason=PointsEventReason.RECOMPUTE).values_list(
+                    "holder_id", "delta"
+                )
+            ),
+            [(self.customers[0].pk, 5), (self.customers[1].pk, -4)],
+        )
+        self.assertEqual(PointsEvent.recompute(Order), 0)
+
+    def test_leaderboard_breaks_ties_by_pk(self):
+        providers = [self.shipping_provider] + [
+            create_shipping_provider(f"Shipping {n}") for n in range(2)
+        ]
+        ShippingProvider.objects.update(points=2)
+        user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(user)
+        response = self.client.get(reverse("admin:leaderboard"))
+        self.assertEqual(list(response.context["shipping_providers"]), providers)
+
+
+class AutocompleteTests(AdminTestCase):
+    """Related rows are picked through the cached, paged autocomplete endpoint"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for n in range(25):
+            create_customer(f"Customer {n}")
+
+    def autocomplete(self, field_name, **params):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {"app_label": "orders", "model_name": "order", "field_name": field_name, **params},
+        )
+        return response.json()
+
+    def test_pages(self):
+        first = self.autocomplete("customer")
+        self.assertEqual(len(first["results"]), 20)
+        self.assertEqual(first["results"][0]["text"], "Customer 24 - None")
+        self.assertTrue(first["pagination"]["more"])
+        second = self.autocomplete("customer", page=2)
+        self.assertEqual(len(second["results"]), 5)
+        self.assertFalse(second["pagination"]["more"])
+
+    def test_cached_until_saved(self):
+        self.autocomplete("customer", term="customer 1")
+        with self.assertNumQueries(2):
+            self.autocomplete("customer", term="customer 1")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_customer("Customer 100")
+        results = self.autocomplete("customer", term="customer 1")["results"]
+        self.assertEqual(results[0]["text"], "Customer 100 - None")
+
+    def test_cached_until_updated(self):
+        self.autocomplete("customer", term="renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.filter(full_name="Customer 3").update(full_name="Renamed")
+        results = self.autocomplete("customer", term="renamed")["results"]
+        self.assertEqual([result["text"] for result in results], ["Renamed - None"])
+        with self.captureOnCommitCallbacks(execute=True):
+            Customer.objects.filter(full_name="Renamed").delete()
+        self.assertEqual(self.autocomplete("customer", term="renamed")["results"], [])
+
+    def test_only_targets_are_invalidated(self):
+        self.assertIn(Customer, autocomplete_targets())
+        self.assertNotIn(Order, autocomplete_targets())
+        with self.captureOnCommitCallbacks(execute=True):
+            create_orders(1, Customer.objects.first(), create_basket())
+        self.assertIsNone(cache.get(_generation_key(Order)))
+        self.assertIsNotNone(cache.get(_generation_key(OrderBasket)))
+
+    def test_change_form_renders_no_choices(self):
+        response = self.client.get(reverse("admin:orders_order_add"))
+        self.assertNotContains(response, "Customer 1 - None")
+        self.assertContains(response, "admin-autocomplete")
+
+
+class RequestProfilingTests(AdminTestCase):
+    """Admin requests are profiled per URL name"""
+
+    def setUp(self):
+        super().setUp()
+        history.clear()
+        self.addCleanup(history.clear)
+        self.orders = create_orders(2, create_customer(), create_basket())
+
+    def test_profile_block_counts_duplicates(self):
+        first, second = self.orders
+        with profile_block() as profile:
+            Order.objects.filter(pk=first.pk).first()
+            Order.objects.filter(pk=first.pk).first()
+            Order.objects.filter(pk=second.pk).first()
+        self.assertEqual((profile.queries.count, profile.queries.duplicates), (3, 1))
+        statement, repeats = profile.queries.most_repeated()
+        self.assertIn("orders_order", statement)
+        self.assertEqual(repeats, 3)
+
+    def test_middleware_records_named_urls(self):
+        url = reverse("admin:orders_order_changelist")
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get("/no-such-page/")
+        [row] = history.summary()
+        self.assertEqual((row["name"], row["count"]), ("orders_order_changelist", 2))
+        self.assertGreater(row["avg_queries"], 0)
+        self.assertEqual(sum(count for _, count in row["histogram"]), 2)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs("utils.profiling", "WARNING") as logs:
+            self.client.get(reverse("admin:orders_order_changelist"))
+        self.assertIn("Slow request GET", logs.output[0])
+        self.assertIn("(orders_order_changelist)", logs.output[0])
+
+
+class ExplainReportQueriesTests(SimpleTestCase):
+    """explain_report_queries flags report queries that scan whole tables"""
+
+    PLANS = {
+        "indexed": "Index Scan using order_live_created_id_idx on orders_order",
+        "scanning": "Seq Scan on orders_order  (cost=0.00..35.50 rows=2550)",
+    }
+
+    def setUp(self):
+        queries = {
+            name: mock.Mock(**{"return_value.explain.return_value": plan})
+            for name, plan in self.PLANS.items()
+        }
+        patcher = mock.patch(
+            "orders.management.commands.explain_report_queries.get_report_queries",
+            return_value=queries,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        command = ExplainReportQueriesCommand(stdout=stdout, stderr=StringIO())
+        command.run_from_argv(["manage.py", "explain_report_queries", *args])
+        return stdout.getvalue()
+
+    def test_find_sequential_scans(self):
+        self.assertEqual(find_sequential_scans(self.PLANS["scanning"]), ["orders_order"])
+        self.assertEqual(find_sequential_scans(self.PLANS["indexed"]), [])
+        sqlite = "SCAN orders_order\nSEARCH customers_customer USING INTEGER PRIMARY KEY"
+        self.assertEqual(find_sequential_scans(sqlite), ["orders_order"])
+        self.assertEqual(find_sequential_scans("SCAN orders_order USING INDEX i"), [])
+
+    def test_reports_without_failing_by_default(self):
+        output = self.run_command()
+        self.assertIn("indexed: OK", output)
+        self.assertIn("scanning: sequential scan on orders_order", output)
+
+    def test_fail_on_seq_scan_exit_code(self):
+        with self.assertRaises(SystemExit) as raised:
+            self.run_command("--fail-on-seq-scan")
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn("indexed: OK", self.run_command("--fail-on-seq-scan", "indexed"))
+
+    def test_unknown_query(self):
+        with self.assertRaisesMessage(CommandError, "Unknown report queries: missing"):
+            call_command("explain_report_queries", "missing")
+
+
+class ConnectionSettingsTests(SimpleTestCase):
+    """DB_* environment variables configure the database connection"""
+
+    def load_settings(self, **environ):
+        environ = {
+            **{k: v for k, v in os.environ.items() if not k.startswith("DB_")},
+            "DATABASE_URL": "postgres://user:pw@db.example.com:5432/finders",
+            **environ,
+        }
+        with mock.patch.dict(os.environ, environ, clear=True), mock.patch(
+            "dotenv.load_dotenv"
+        ):
+            return runpy.run_path(finders.settings.__file__)
+
+    def test_defaults(self):
+        settings = self.load_settings()
+        database = settings["DATABASES"]["default"]
+        self.assertEqual(database["ENGINE"], "utils.postgresql")
+        self.assertEqual(database["CONN_MAX_AGE"], 60)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertEqual(database["OPTIONS"]["connect_timeout"], 5)
+        self.assertNotIn("DISABLE_SERVER_SIDE_CURSORS", database)
+
+    def test_conn_max_age(self):
+        for value, expected in (("none", None), ("0", 0), ("300", 300)):
+            with self.subTest(value):
+                settings = self.load_settings(DB_CONN_MAX_AGE=value)
+                self.assertEqual(
+                    settings["DATABASES"]["default"]["CONN_MAX_AGE"], expected
+                )
+
+    def test_health_checks_and_timeout(self):
+        settings = self.load_settings(DB_CONN_HEALTH_CHECKS="0", DB_CONNECT_TIMEOUT="2")
+        database = settings["DATABASES"]["default"]
+        self.assertFalse(database["CONN_HEALTH_CHECKS"])
+        self.assertEqual(database["OPTIONS"]["connect_timeout"], 2)
+
+    def test_pool_mode(self):
+        settings = self.load_settings(DB_POOL_MODE="pgbouncer")
+        self.assertTrue(settings["DATABASES"]["default"]["DISABLE_SERVER_SIDE_CURSORS"])
+        with self.assertRaisesMessage(ImproperlyConfigured, "Unknown DB_POOL_MODE"):
+            self.load_settings(DB_POOL_MODE="session")
+
+
+class RelatedOrdersTests(AdminTestCase):
+    """Basket and delivery provider forms list their orders a page at a time"""
+
+    def setUp(self):
+        super().setUp()
+        self.delivery_provider = DeliveryProvider.objects.create(
+            name="Delivery", phone_number="1"
+        )
+        self.basket = create_basket()
+        customer = create_customer()
+        for has_received_price in (True, False):
+            create_orders(
+                15,
+                customer,
+                self.basket,
+                delivery_provider=self.delivery_provider,
+                has_received_price=has_received_price,
+            )
+
+    def change_form_data(self, response):
+        """POST data saving the change form as it was rendered"""
+        formset = response.context["inline_admin_formsets"][0].formset
+        data = {
+            f"{formset.management_form.prefix}-{name}": value
+            for name, value in formset.management_form.initial.items()
+        }
+        for form in [response.context["adminform"].form, *formset.forms]:
+            for name in form.fields:
+                value = form[name].value()
+                if value is not None:
+                    data[form.add_prefix(name)] = value
+        return data
+
+    def test_change_form_edits_one_page_of_orders(self):
+        url = reverse("admin:orders_orderbasket_change", args=(self.basket.pk,))
+        response = self.client.get(url)
+        self.assertContains(response, "order_set-19-id")
+        self.assertNotContains(response, "order_set-20-id")
+        formset = response.context["inline_admin_formsets"][0].formset
+        older = formset.next_page_query()
+        self.assertIsNone(formset.previous_page_query())
+
+        response = self.client.get(url + older)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), 10)
+        self.assertIsNone(formset.next_page_query())
+
+        data = self.change_form_data(response)
+        data["order_set-0-bill_id"] = "B-1"
+        response = self.client.post(url + older, data)
+        self.assertEqual(response.status_code, 302)
+        oldest = Order.objects.filter(order_basket=self.basket).order_by(
+            "created_at", "id"
+        )
+        self.assertEqual(oldest[9].bill_id, "B-1")
+        self.assertEqual(Order.objects.filter(bill_id="B-1").count(), 1)
+
+    def test_delivery_provider_form_shows_orders_once(self):
+        url = reverse(
+            "admin:providers_deliveryprovider_change", args=(self.delivery_provider.pk,)
+        )
+        response = self.client.get(url)
+        [inline] = response.context["inline_admin_formsets"]
+        self.assertEqual(len(inline.formset.forms), 20)
+        order = Order.objects.order_by("-created_at", "-id").first()
+        change_url = reverse("admin:orders_order_change", args=(order.pk,))
+        self.assertContains(response, change_url, count=1)
+
+
+class RangeSummaryTests(AdminTestCase):
+    """The range totals count exactly the orders the range lists"""
+
+    def test_totals_match_listed_orders(self):
+        orders = create_orders(3, create_customer(), create_basket())
+        # Early on the first day of the default range, and the day before it
+        first_day = timezone.localdate() - timedelta(days=30)
+        early = timezone.make_aware(datetime.combine(first_day, time(0, 30)))
+        Order.objects.filter(pk=orders[0].pk).update(created_at=early)
+        Order.objects.filter(pk=orders[1].pk).update(created_at=early - timedelta(days=1))
+
+        response = self.client.get(reverse("admin:range_summary"))
+        totals = response.context["range_totals"]
+        self.assertEqual(len(response.context["orders"]), 2)
+        self.assertEqual((totals["order_count"], totals["total_price"]), (2, 20))
+        self.assertEqual(response.context["date_from"], first_day)
+
+    def test_date_to_is_inclusive(self):
+        create_orders(1, create_customer(), create_basket())
+        today = timezone.localdate().isoformat()
+        response = self.client.get(
+            reverse("admin:range_summary"), {"date_from": today, "date_to": today}
+        )
+        self.assertEqual(len(response.context["orders"]), 1)
+        self.assertEqual(response.context["range_totals"]["order_count"], 1)
+
+
+class OverviewCacheTests(AdminTestCase):
+    """The Overview metrics are cached until a money change commits"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        create_orders(
+            1,
+            create_customer(),
+            create_basket(),
+            has_received_price=True,
+            customer_delivery_charge=4,
+        )
+
+    def overview(self):
+        return self.client.get(reverse("admin:overview")).context
+
+    def test_cached_between_requests(self):
+        self.overview()
+        with CaptureQueriesContext(connection) as queries:
+            context = self.overview()
+        self.assertFalse(any("rollup" in query["sql"] for query in queries))
+        self.assertEqual(context["cache_stats"], {"hits": 1, "misses": 1})
+
+    def test_money_change_invalidates_on_commit(self):
+        self.assertEqual(self.overview()["total_money_received_from_orders"], "4.0$")
+        order = Order.objects.get()
+        with self.captureOnCommitCallbacks() as callbacks:
+            order.customer_delivery_charge = 9
+            order.save()
+            # Other requests keep the committed figures until then
+            self.assertEqual(
+                self.overview()["total_money_received_from_orders"], "4.0$"
+            )
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.overview()["total_money_received_from_orders"], "9.0$")
+
+    def test_bulk_update_invalidates_on_commit(self):
+        self.overview()
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.update(has_received_price=False)
+        self.assertEqual(self.overview()["total_money_received_from_orders"], "0.0$")
+
+
+class RangeExportTests(AdminTestCase):
+    """The range summary exports every order of the range"""
+
+    def setUp(self):
+        super().setUp()
+        customer = create_customer("Mona Yehia")
+        self.basket = create_basket()
+        create_orders(2, customer, self.basket, total_price=10)
+        create_orders(1, customer, self.basket, total_price=25, status="delivered")
+
+    def export(self, **params):
+        response = self.client.get(reverse("admin:export_range_summary"), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_xlsx(self):
+        workbook = openpyxl.load_workbook(BytesIO(self.export()), read_only=True)
+        rows = list(workbook["Orders Report"].values)
+        header = rows.index(("ID", "Customer", "Status", "Total Price ($)", "Created At", "Notes"))
+        orders = rows[header + 1 : header + 4]
+        self.assertEqual({row[1] for row in orders}, {"Mona Yehia"})
+        self.assertEqual(sorted(row[3] for row in orders), [10, 10, 25])
+        self.assertIn("Delivered", {row[2] for row in orders})
+        self.assertEqual(rows[-1][:4], ("Total Orders: 3", None, "Total Value:", 45))
+
+    def test_csv_columns(self):
+        content = self.export(format="csv", columns="id,customer,total_price")
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertEqual(rows[0], ["id", "customer", "total_price"])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            sorted(float(row[2]) for row in rows[1:]), [10, 10, 25]
+        )
+        self.assertEqual({row[1] for row in rows[1:]}, {"Mona Yehia"})
+
+    def test_csv_baskets(self):
+        content = self.export(format="csv", dataset="baskets", columns="id,orders_count")
+        rows = list(csv.reader(StringIO(content.decode())))
+        self.assertEqual(rows, [["id", "orders_count"], [str(self.basket.pk), "3"]])
+
+    def test_invalid_parameters(self):
+        url = reverse("admin:export_range_summary")
+        for params in (
+            {"format": "csv", "columns": "id,password"},
+            {"format": "csv", "dataset": "customers"},
+            {"format": "pdf"},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+    @skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(
+            BytesIO(self.export(format="parquet", columns="id,total_price,created_at"))
+        )
+        self.assertEqual(table.column_names, ["id", "total_price", "created_at"])
+        self.assertEqual(sorted(table.column("total_price").to_pylist()), [10, 10, 25])
+
+    def test_parquet_without_pyarrow(self):
+        with mock.patch("orders.exports.pyarrow", None):
+            response = self.client.get(
+                reverse("admin:export_range_summary"), {"format": "parquet"}
+            )
+        self.assertEqual(response.status_code, 501)
+
+
+class PdfResourcesTests(SimpleTestCase):
+    """Fonts and styles are loaded once per process"""
+
+    def test_loaded_once(self):
+        with mock.patch("orders.pdf._resources", None), mock.patch(
+            "orders.pdf.PdfResources", wraps=PdfResources
+        ) as load:
+            resources = get_pdf_resources()
+            self.assertIs(get_pdf_resources(), resources)
+        self.assertEqual(load.call_count, 1)
+
+    def test_missing_font_falls_back_with_a_warning(self):
+        with mock.patch("orders.pdf.FONT_PATH", "/nonexistent/font.ttf"):
+            with self.assertLogs("orders.pdf", "WARNING") as logs:
+                resources = PdfResources()
+        self.assertIn("Could not register Arabic font", logs.output[0])
+        self.assertFalse(resources.arabic_font_available)
+        self.assertEqual(
+            (resources.font, resources.bold_font), ("Helvetica", "Helvetica-Bold")
+        )
+
+
+class ArabicTextTests(SimpleTestCase):
+    """Only right-to-left text is shaped, and each string once"""
+
+    def setUp(self):
+        _shape_arabic_text.cache_clear()
+        self.addCleanup(_shape_arabic_text.cache_clear)
+
+    def test_left_to_right_text_is_not_shaped(self):
+        with mock.patch("orders.pdf.arabic_reshaper.reshape") as reshape:
+            self.assertEqual(process_arabic_text("Mona 03-111 $"), "Mona 03-111 $")
+            self.assertEqual(process_arabic_texts([None, 5, ""]), [None, 5, ""])
+        reshape.assert_not_called()
+        self.assertEqual(get_arabic_text_cache_stats()["misses"], 0)
+
+    def test_shaped_text_is_cached(self):
+        shaped = process_arabic_text("محمد علي")
+        self.assertNotEqual(shaped, "محمد علي")
+        with mock.patch("orders.pdf.arabic_reshaper.reshape") as reshape:
+            self.assertEqual(
+                process_arabic_texts(["محمد علي", "محمد علي"]), [shaped, shaped]
+            )
+        reshape.assert_not_called()
+        stats = get_arabic_text_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 1, 1))
+
+
+class ParallelOrdersPdfTests(TestCase):
+    """Orders PDFs rendered in chunks read like the ones rendered at once"""
+
+    def setUp(self):
+        basket = create_basket()
+        for n in range(7):
+            create_orders(1, create_customer(f"زبون {n}"), basket, bill_id=f"B-{n}")
+        self.orders = list(get_report_orders(Order.objects.values("id")))
+
+    def pages(self, build, **kwargs):
+        output = BytesIO()
+        build(self.orders, output, **kwargs)
+        output.seek(0)
+        return [page.extract_text() for page in PdfReader(output).pages]
+
+    def test_matches_serial_output(self):
+        serial = self.pages(build_orders_pdf)
+        parallel = self.pages(build_orders_pdf_parallel, chunk_size=3, workers=2)
+        # One more page per chunk, as every chunk starts on a new page
+        self.assertGreater(len(parallel), len(serial))
+        for pattern in (r"Order #\d+", r"B-\d", r"Total \w+:\s*\S+"):
+            with self.subTest(pattern):
+                self.assertEqual(
+                    re.findall(pattern, "".join(parallel)),
+                    re.findall(pattern, "".join(serial)),
+                )
+
+    def test_pages_are_numbered_across_chunks(self):
+        pages = self.pages(build_orders_pdf_parallel, chunk_size=2, workers=2)
+        for number, text in enumerate(pages, 1):
+            self.assertEqual(re.findall(r"Page \d+", text), [f"Page {number}"])
+
+
+class ReportSelectionTests(AdminTestCase):
+    """Print actions pass their selection to the PDF views as a short token"""
+
+    def setUp(self):
+        super().setUp()
+        self.orders = create_orders(3, create_customer(), create_basket())
+        self.ids = [order.pk for order in self.orders]
+
+    def print_pdf(self, **params):
+        return self.client.get(reverse("admin:print_orders_pdf"), params)
+
+    def test_action_opens_pdf_by_token(self):
+        response = self.client.post(
+            reverse("admin:orders_order_changelist"),
+            {"action": "print_to_pdf", "_selected_action": self.ids},
+        )
+        selection = ReportSelection.objects.get()
+        self.assertContains(response, f"?selection={selection.token}")
+        self.assertEqual(sorted(selection.object_ids), self.ids)
+        response = self.print_pdf(selection=selection.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+    @override_settings(REPORT_SELECTION_TTL=60)
+    def test_tokens_expire_and_are_purged(self):
+        orders = Order.objects.filter(pk__in=self.ids)
+        expired = ReportSelection.create_for(ReportJobKind.ORDERS, orders)
+        ReportSelection.objects.filter(pk=expired.pk).update(
+            created_at=timezone.now() - timedelta(seconds=61)
+        )
+        self.assertEqual(self.print_pdf(selection=expired.token).status_code, 404)
+        current = ReportSelection.create_for(ReportJobKind.ORDERS, orders)
+        self.assertEqual(list(ReportSelection.objects.all()), [current])
+
+    def test_token_of_another_kind_is_refused(self):
+        selection = ReportSelection.create_for(
+            ReportJobKind.ORDERS, Order.objects.filter(pk__in=self.ids)
+        )
+        response = self.client.get(
+            reverse("admin:print_order_baskets_pdf"), {"selection": selection.token}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_ids_parameter(self):
+        ids = ",".join(map(str, self.ids))
+        self.assertEqual(self.print_pdf(ids=ids).status_code, 200)
+        self.assertEqual(self.print_pdf(ids="1,x").status_code, 400)
+        self.assertEqual(self.print_pdf().status_code, 400)
+
+
+@override_settings(REPORT_JOB_CONCURRENCY=1, REPORT_JOB_TIMEOUT=60)
+class ReportJobQueueTests(TestCase):
+    """Background reports are claimed oldest first within the concurrency limit"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.jobs_dir = directory.name
+        jobs_dir = override_settings(REPORT_JOBS_DIR=self.jobs_dir)
+        jobs_dir.enable()
+        self.addCleanup(jobs_dir.disable)
+
+    def add_job(self):
+        return ReportJob.objects.create(kind=ReportJobKind.ORDERS, object_ids=[])
+
+    def test_claims_oldest_pending(self):
+        first, _ = self.add_job(), self.add_job()
+        job = claim_next_job()
+        self.assertEqual(job, first)
+        self.assertEqual(job.status, ReportJobStatus.RUNNING)
+        self.assertIsNotNone(job.started_at)
+
+    def test_concurrency_limit(self):
+        self.add_job()
+        self.add_job()
+        self.assertIsNotNone(claim_next_job())
+        self.assertIsNone(claim_next_job())
+
+    def test_timed_out_jobs_fail(self):
+        stuck = self.add_job()
+        ReportJob.objects.filter(pk=stuck.pk).update(
+            status=ReportJobStatus.RUNNING,
+            started_at=timezone.now() - timedelta(seconds=120),
+        )
+        pending = self.add_job()
+        self.assertEqual(claim_next_job(), pending)
+        stuck.refresh_from_db()
+        self.assertEqual((stuck.status, stuck.error), (ReportJobStatus.FAILED, "Timed out"))
+
+    def test_failed_build_is_recorded(self):
+        def build(queryset, output):
+            raise ValueError("Broken report")
+
+        self.add_job()
+        job = claim_next_job()
+        with mock.patch.dict(REPORT_BUILDERS, {ReportJobKind.ORDERS: (list, build)}):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (ReportJobStatus.FAILED, "Broken report"))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(os.listdir(self.jobs_dir), [])
+
+    def test_finished_job_moves_file_into_place(self):
+        def build(queryset, output):
+            output.write(b"%PDF")
+
+        self.add_job()
+        job = claim_next_job()
+        with mock.patch.dict(REPORT_BUILDERS, {ReportJobKind.ORDERS: (list, build)}):
+            run_job(job)
+        self.assertEqual(job.status, ReportJobStatus.DONE)
+        self.assertEqual(os.listdir(self.jobs_dir), [os.path.basename(job.file_path)])
+
+    def test_timeout_during_build_keeps_job_failed(self):
+        def build(queryset, output):
+            output.write(b"%PDF")
+            # The timeout fires while the job is still rendering
+            ReportJob.objects.filter(pk=slow.pk).update(
+                started_at=timezone.now() - timedelta(seconds=120)
+            )
+            self.assertEqual(claim_next_job(), pending)
+
+        self.add_job()
+        pending = self.add_job()
+        slow = claim_next_job()
+        with mock.patch.dict(REPORT_BUILDERS, {ReportJobKind.ORDERS: (list, build)}):
+            run_job(slow)
+        slow.refresh_from_db()
+        self.assertEqual((slow.status, slow.error), (ReportJobStatus.FAILED, "Timed out"))
+        self.assertIsNone(slow.file_path)
+        self.assertEqual(os.listdir(self.jobs_dir), [])
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+@override_settings(REPORT_JOB_CONCURRENCY=1)
+class ReportJobClaimConcurrencyTests(TransactionTestCase):
+    """Workers claiming at the same time stay within the concurrency limit"""
+
+    def test_concurrent_claims(self):
+        for _ in range(4):
+            ReportJob.objects.create(kind=ReportJobKind.ORDERS, object_ids=[])
+        barrier = threading.Barrier(4)
+        claimed = []
+
+        def claim():
+            try:
+                barrier.wait()
+                claimed.append(claim_next_job())
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len([job for job in claimed if job is not None]), 1)
+        self.assertEqual(
+            ReportJob.objects.filter(status=ReportJobStatus.RUNNING).count(), 1
+        )
@@ -2,12 +2,11 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.http import urlencode
 from django.utils.html import format_html
-from orders.models import Order
+from orders.admin import OrderInline
 from providers.models import DeliveryProvider, ShippingProvider, ShippingSource
 
-from django_admin_inline_paginator_plus.admin import StackedInlinePaginated
 from utils.models import BaseAdminModel
-from django.db.models import Sum
+from django.db.models import Count, Q, Sum
 
 
 # Register your models here.
@@ -20,63 +19,21 @@ class BaseProvider(BaseAdminModel):
 class ShippingProviderAdmin(BaseProvider):
     model = ShippingProvider
     list_display = ("name", "phone_number", "points")
-
-
-class OrderDeliverProviderInline(StackedInlinePaginated):
-    model = Order
-    per_page = 5
-    extra = 0
-
-    classes = [
-        "collapse",
-    ]
-
-    fieldsets = (
-        (
-            "Order Info",
-            {
-                "fields": (
-                    "bill_id",
-                    "status",
-                    "customer",
-                    # "get_order_url",
-                ),
-            },
-        ),
-        (
-            "Delivery Charges",
-            {
-                "fields": (
-                    "total_price",
-                    "delivered_at",
-                    "has_received_price",
-                    "delivery_charge",
-                    "customer_delivery_charge",
-                ),
-            },
-        ),
-    )
-
-
-class ReceivedOrderDeliverProviderInline(OrderDeliverProviderInline):
-    verbose_name = "Received Price Order"
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).filter(has_received_price=True)
-
-
-class PendingOrderDeliverProviderInline(OrderDeliverProviderInline):
-    verbose_name = "Pending Price Order"
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).filter(has_received_price=False)
+    # Points are accrued from order baskets, see orders.models.PointsEvent
+    readonly_fields = (*BaseAdminModel.readonly_fields, "points")
 
 
 @admin.register(DeliveryProvider)
 class DeliveryProviderAdmin(BaseProvider):
     model = DeliveryProvider
+    inlines = [OrderInline]
 
     list_display = ("name", "phone_number", "get_orders_count")
+    list_column_annotations = {
+        "get_orders_count": {
+            "orders_count": Count("order", filter=Q(order__deleted_at__isnull=True))
+        }
+    }
     readonly_fields = ("missing_money_from_provider",)
 
     fieldsets = (
@@ -88,12 +45,10 @@ class DeliveryProviderAdmin(BaseProvider):
 
     change_form_template = "providers/index.html"
 
-    inlines = [ReceivedOrderDeliverProviderInline, PendingOrderDeliverProviderInline]
-
+    @admin.display(ordering="orders_count", description="Orders")
     def get_orders_count(self, obj):
-        count = obj.order_set.count()
         url = f"/orders/order/?delivery_provider_id={obj.id}"
-        return format_html('<a href="{}">{} Orders</a>', url, count)
+        return format_html('<a href="{}">{} Orders</a>', url, obj.orders_count)
 
     def missing_money_from_provider(self, obj):
         return f"{obj.order_set.filter(has_received_price=False).aggregate(r=Sum('total_price')).get('r')}$"
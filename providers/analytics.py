@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+from django.db.models import F, FloatField, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncWeek
+
+from orders.models import OrderBasketDailyRollup
+
+BUCKETS = {
+    "day": TruncDay,
+    "week": TruncWeek,
+}
+
+
+def get_date_range(request):
+    """
+    Read the date_from/date_to GET parameters, defaulting to the last 30 days.
+    The end date is inclusive
+    """
+    date_from_str = request.GET.get("date_from", "")
+    date_to_str = request.GET.get("date_to", "")
+
+    if not date_from_str:
+        date_from = datetime.today() - timedelta(days=30)
+    else:
+        date_from = datetime.strptime(date_from_str, "%Y-%m-%d")
+
+    if not date_to_str:
+        date_to = datetime.today()
+    else:
+        date_to = datetime.strptime(date_to_str, "%Y-%m-%d")
+        date_to = date_to.replace(hour=23, minute=59, second=59)
+
+    return date_from, date_to, bool(date_from_str or date_to_str)
+
+
+def _sum(field):
+    return Coalesce(Sum(field), 0, output_field=FloatField())
+
+
+def _aggregate(queryset):
+    return queryset.annotate(
+        total_weight=_sum("items_weight"),
+        order_count=Coalesce(Sum("row_count"), 0),
+        total_shipping_charge=_sum("shipping_charge"),
+        total_sales=_sum("total_price"),
+        total_paid=_sum("total_paid_price"),
+    ).annotate(profit=F("total_sales") - F("total_paid"))
+
+
+def _baskets_in_range(date_from, date_to):
+    # Answered from the daily rollups, the cost depends on the number of days
+    return OrderBasketDailyRollup.objects.filter(
+        day__gte=date_from.date(), day__lte=date_to.date(), row_count__gt=0
+    )
+
+
+def get_provider_stats(date_from, date_to):
+    """
+    Weight, basket count and money totals per shipping provider,
+    computed in a single grouped query over the basket daily rollups
+    """
+    return _aggregate(
+        _baskets_in_range(date_from, date_to).values(
+            provider_id=F("shipping_provider_id"),
+            provider_name=F("shipping_provider__name"),
+        )
+    ).order_by("provider_name")
+
+
+def get_provider_trends(date_from, date_to, bucket="day"):
+    """
+    Same totals as get_provider_stats, additionally grouped by day or week
+    """
+    trunc = BUCKETS[bucket]
+    return _aggregate(
+        _baskets_in_range(date_from, date_to)
+        .annotate(period=trunc("day"))
+        .values(
+            "period",
+            provider_id=F("shipping_provider_id"),
+            provider_name=F("shipping_provider__name"),
+        )
+    ).order_by("period", "provider_name")
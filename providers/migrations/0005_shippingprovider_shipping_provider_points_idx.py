@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0004_shippingprovider_points'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='shippingprovider',
+            index=models.Index(models.OrderBy(models.F('points'), descending=True), name='shipping_provider_points_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.13 on 2026-10-17 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('providers', '0005_shippingprovider_shipping_provider_points_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='shippingprovider',
+            name='shipping_provider_points_idx',
+        ),
+        migrations.AddIndex(
+            model_name='shippingprovider',
+            index=models.Index(models.OrderBy(models.F('points'), descending=True), models.F('baseprovider_ptr'), name='shipping_provider_points_idx'),
+        ),
+    ]
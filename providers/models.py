@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 
 from utils.models import BaseModel
 
@@ -22,8 +23,20 @@ class ShippingSource(BaseModel):
 class ShippingProvider(BaseProvider):
     price_per_kg = models.FloatField()
     address = models.CharField(max_length=255)
+    # Earned from order baskets, see orders.models.PointsEvent
     points = models.IntegerField(default=0)
 
+    counter_fields = ("points",)
+
+    class Meta:
+        # Points leaderboard, with the pk as tiebreak. deleted_at lives on the
+        # BaseProvider table, so unlike the customer index it cannot be partial
+        indexes = [
+            models.Index(
+                F("points").desc(), "baseprovider_ptr", name="shipping_provider_points_idx"
+            )
+        ]
+
 
 class DeliveryProvider(BaseProvider):
     pass
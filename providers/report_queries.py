@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from orders.models import OrderBasket
+from providers.analytics import get_provider_stats, get_provider_trends
+from providers.models import ShippingProvider
+from utils.explain import report_query
+
+
+def _last_30_days():
+    date_to = datetime.today()
+    return date_to - timedelta(days=30), date_to
+
+
+@report_query("shipping_provider_stats")
+def shipping_provider_stats():
+    return get_provider_stats(*_last_30_days())
+
+
+@report_query("shipping_provider_trends")
+def shipping_provider_trends():
+    return get_provider_trends(*_last_30_days(), bucket="week")
+
+
+@report_query("shipping_provider_baskets")
+def shipping_provider_baskets():
+    date_from, date_to = _last_30_days()
+    provider_id = ShippingProvider.objects.values_list("pk", flat=True).first() or 0
+    return OrderBasket.objects.filter(
+        shipping_provider_id=provider_id,
+        created_at__gte=date_from,
+        created_at__lte=date_to,
+    )
@@ -1,3 +1,80 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import OrderBasket
+from providers.analytics import get_provider_stats
+from utils.testing import AdminTestCase, create_basket, create_shipping_provider
+
+
+class ProviderStatsTests(AdminTestCase):
+    """Shipping provider stats are grouped in one query, not one per provider"""
+
+    def setUp(self):
+        super().setUp()
+        self.date_from = datetime.today() - timedelta(days=30)
+        self.date_to = datetime.today()
+        self.created = 0
+
+    def add_providers(self, count):
+        for _ in range(count):
+            self.created += 1
+            n = self.created
+            provider = create_shipping_provider(f"Shipping {n}")
+            for weight in range(1, n + 1):
+                create_basket(
+                    provider,
+                    items_weight=weight,
+                    total_price=100 * n,
+                    total_paid_price=60 * n,
+                    shipping_charge=5,
+                )
+            # Outside the range, and deleted, neither is counted
+            old = create_basket(provider, items_weight=50, total_price=1000)
+            OrderBasket.objects.filter(pk=old.pk).update(
+                created_at=timezone.now() - timedelta(days=60)
+            )
+            create_basket(provider, items_weight=50, total_price=1000).delete()
+
+    def test_stats_match_per_provider_totals(self):
+        self.add_providers(3)
+        with self.assertNumQueries(1):
+            stats = list(get_provider_stats(self.date_from, self.date_to))
+        self.assertEqual(len(stats), 3)
+        for row in stats:
+            expected = OrderBasket.objects.filter(
+                shipping_provider_id=row["provider_id"],
+                created_at__date__gte=self.date_from.date(),
+            ).aggregate(
+                order_count=Count("pk"),
+                total_weight=Sum("items_weight"),
+                total_shipping_charge=Sum("shipping_charge"),
+                total_sales=Sum("total_price"),
+                total_paid=Sum("total_paid_price"),
+            )
+            for name, value in expected.items():
+                self.assertAlmostEqual(row[name], value, msg=name)
+            self.assertAlmostEqual(
+                row["profit"], expected["total_sales"] - expected["total_paid"]
+            )
+
+    def count_queries(self, url_name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_providers(self):
+        for url_name in (
+            "admin:shipping_provider_analyze",
+            "admin:export_shipping_provider_analyze",
+        ):
+            with self.subTest(url_name):
+                self.add_providers(2)
+                few = self.count_queries(url_name)
+                self.add_providers(3)
+                self.assertEqual(self.count_queries(url_name), few)
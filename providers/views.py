@@ -1,14 +1,11 @@
-from datetime import datetime, timedelta
 from django import views
 from django.shortcuts import render
 from django.http import HttpResponse
-from django.db.models import Sum
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 
-from .models import ShippingProvider
-from orders.models import OrderBasket
+from .analytics import BUCKETS, get_date_range, get_provider_stats, get_provider_trends
 
 
 class ShippingProviderAnalyze(views.generic.ListView):
@@ -20,53 +17,23 @@ class ShippingProviderAnalyze(views.generic.ListView):
     def get(self, request):
         ctx = self.admin.each_context(request) if hasattr(self.admin, 'each_context') else {}
         
-        # Get date parameters from request
-        date_from_str = request.GET.get('date_from', '')
-        date_to_str = request.GET.get('date_to', '')
+        date_from, date_to, is_filtered = get_date_range(request)
+        bucket = request.GET.get('bucket', 'day')
+        if bucket not in BUCKETS:
+            bucket = 'day'
         
-        # Set default dates if not provided
-        if not date_from_str:
-            date_from = datetime.today() - timedelta(days=30)  # Default to last 30 days
-        else:
-            date_from = datetime.strptime(date_from_str, '%Y-%m-%d')
-            
-        if not date_to_str:
-            date_to = datetime.today()
-        else:
-            date_to = datetime.strptime(date_to_str, '%Y-%m-%d')
-            # Make the end date inclusive by setting it to end of day
-            date_to = date_to.replace(hour=23, minute=59, second=59)
-        
-        # Get shipping provider stats with sum of item weights
-        provider_stats = []
-        
-        shipping_providers = ShippingProvider.objects.all()
-        for provider in shipping_providers:
-            total_weight = OrderBasket.objects.filter(
-                shipping_provider=provider,
-                created_at__gte=date_from,
-                created_at__lte=date_to
-            ).aggregate(total_weight=Sum('items_weight'))['total_weight'] or 0
-            
-            order_count = OrderBasket.objects.filter(
-                shipping_provider=provider,
-                created_at__gte=date_from,
-                created_at__lte=date_to
-            ).count()
-            
-            provider_stats.append({
-                'provider_name': provider.name,
-                'total_weight': total_weight,
-                'order_count': order_count,
-                'provider_id': provider.id
-            })
+        # Both tables come from one grouped query each, whatever the number of providers
+        provider_stats = list(get_provider_stats(date_from, date_to))
+        provider_trends = list(get_provider_trends(date_from, date_to, bucket))
         
         # Add context variables
         ctx.update({
             'provider_stats': provider_stats,
+            'provider_trends': provider_trends,
+            'bucket': bucket,
             'date_from': date_from,
             'date_to': date_to,
-            'is_filtered': bool(date_from_str or date_to_str)
+            'is_filtered': is_filtered
         })
         
         return render(request, "shipping-provider-analyze.html", ctx)
@@ -76,44 +43,10 @@ def export_shipping_provider_analyze(request):
     """
     Export shipping provider analysis to Excel
     """
-    # Get date parameters from request
-    date_from_str = request.GET.get('date_from', '')
-    date_to_str = request.GET.get('date_to', '')
-    
-    # Set default dates if not provided
-    if not date_from_str:
-        date_from = datetime.today() - timedelta(days=30)
-    else:
-        date_from = datetime.strptime(date_from_str, '%Y-%m-%d')
-        
-    if not date_to_str:
-        date_to = datetime.today()
-    else:
-        date_to = datetime.strptime(date_to_str, '%Y-%m-%d')
-        date_to = date_to.replace(hour=23, minute=59, second=59)
+    date_from, date_to, _ = get_date_range(request)
     
     # Get shipping provider stats
-    shipping_providers = ShippingProvider.objects.all()
-    provider_stats = []
-    
-    for provider in shipping_providers:
-        total_weight = OrderBasket.objects.filter(
-            shipping_provider=provider,
-            created_at__gte=date_from,
-            created_at__lte=date_to
-        ).aggregate(total_weight=Sum('items_weight'))['total_weight'] or 0
-        
-        order_count = OrderBasket.objects.filter(
-            shipping_provider=provider,
-            created_at__gte=date_from,
-            created_at__lte=date_to
-        ).count()
-        
-        provider_stats.append({
-            'provider_name': provider.name,
-            'total_weight': total_weight,
-            'order_count': order_count,
-        })
+    provider_stats = list(get_provider_stats(date_from, date_to))
     
     # Create a workbook and select the active worksheet
     wb = openpyxl.Workbook()
@@ -121,14 +54,21 @@ def export_shipping_provider_analyze(request):
     ws.title = "Shipping Provider Report"
     
     # Add header with date range
-    ws.merge_cells('A1:C1')
+    ws.merge_cells('A1:G1')
     header_cell = ws['A1']
     header_cell.value = f"Shipping Provider Analysis ({date_from.strftime('%Y-%m-%d')} to {date_to.strftime('%Y-%m-%d')})"
     header_cell.font = Font(size=14, bold=True)
     header_cell.alignment = Alignment(horizontal='center')
     
     # Create column headers
-    headers = ['Provider Name', 'Total Weight (kg)', 'Order Count']
+    headers = [
+        'Provider Name', 'Total Weight (kg)', 'Order Count', 'Shipping Charge ($)',
+        'Total Price ($)', 'Total Paid ($)', 'Profit ($)',
+    ]
+    totals_keys = [
+        'total_weight', 'order_count', 'total_shipping_charge',
+        'total_sales', 'total_paid', 'profit',
+    ]
     for col_num, header in enumerate(headers, 1):
         col_letter = get_column_letter(col_num)
         ws[f'{col_letter}3'] = header
@@ -139,19 +79,18 @@ def export_shipping_provider_analyze(request):
     row_num = 4
     for stat in provider_stats:
         ws[f'A{row_num}'] = stat['provider_name']
-        ws[f'B{row_num}'] = stat['total_weight']
-        ws[f'C{row_num}'] = stat['order_count']
+        for col_num, key in enumerate(totals_keys, 2):
+            ws[f'{get_column_letter(col_num)}{row_num}'] = stat[key]
         row_num += 1
     
     # Add summary row
     ws[f'A{row_num+1}'] = f"Total Providers: {len(provider_stats)}"
     ws[f'A{row_num+1}'].font = Font(bold=True)
     
-    ws[f'B{row_num+1}'] = sum(stat['total_weight'] for stat in provider_stats)
-    ws[f'B{row_num+1}'].font = Font(bold=True)
-    
-    ws[f'C{row_num+1}'] = sum(stat['order_count'] for stat in provider_stats)
-    ws[f'C{row_num+1}'].font = Font(bold=True)
+    for col_num, key in enumerate(totals_keys, 2):
+        cell = ws[f'{get_column_letter(col_num)}{row_num+1}']
+        cell.value = sum(stat[key] for stat in provider_stats)
+        cell.font = Font(bold=True)
     
     # Auto-size columns
     for col in range(1, len(headers) + 1):
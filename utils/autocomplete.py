@@ -0,0 +1,99 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.autocomplete import AutocompleteJsonView
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import JsonResponse
+
+
+def _generation_key(model):
+    return f"autocomplete:{model._meta.label_lower}:generation"
+
+
+@lru_cache(maxsize=None)
+def autocomplete_targets():
+    """Models listed by an autocomplete widget of the registered admins"""
+    targets = set()
+    for model, model_admin in admin.site._registry.items():
+        for field_name in model_admin.autocomplete_fields:
+            remote_model = model._meta.get_field(field_name).remote_field.model
+            remote_admin = admin.site._registry.get(remote_model)
+            if remote_admin is not None and remote_admin.search_fields:
+                targets.add(remote_model)
+    return frozenset(targets)
+
+
+def invalidate_autocomplete(model):
+    """
+    Drop the cached results of the model once the current transaction
+    commits. Models no autocomplete widget lists have nothing cached
+    """
+    if model._meta.concrete_model not in autocomplete_targets():
+        return
+
+    def bump():
+        try:
+            cache.incr(_generation_key(model))
+        except ValueError:
+            cache.set(_generation_key(model), 1, None)
+
+    transaction.on_commit(bump)
+
+
+class CachedAutocompleteJsonView(AutocompleteJsonView):
+    """
+    Autocomplete endpoint of the admin site. Results are the newest matches
+    first, paged without counting them, and cached per field, term and page
+    for at most AUTOCOMPLETE_CACHE_TIMEOUT seconds
+    """
+
+    def get(self, request, *args, **kwargs):
+        (
+            self.term,
+            self.model_admin,
+            self.source_field,
+            to_field_name,
+        ) = self.process_request(request)
+
+        if not self.has_perm(request):
+            raise PermissionDenied
+
+        page = self.get_page_number()
+        key = self.get_cache_key(page)
+        data = cache.get(key)
+        if data is None:
+            data = self.get_results(page, to_field_name)
+            cache.set(key, data, settings.AUTOCOMPLETE_CACHE_TIMEOUT)
+        return JsonResponse(data)
+
+    def get_page_number(self):
+        try:
+            return max(int(self.request.GET.get(self.page_kwarg, 1)), 1)
+        except ValueError:
+            return 1
+
+    def get_cache_key(self, page):
+        remote_model = self.source_field.remote_field.model
+        generation = cache.get(_generation_key(remote_model), 0)
+        source = self.source_field.model._meta.label_lower
+        digest = hashlib.sha1(
+            json.dumps([source, self.source_field.name, self.term, page]).encode()
+        ).hexdigest()
+        return f"autocomplete:{remote_model._meta.label_lower}:{generation}:{digest}"
+
+    def get_results(self, page, to_field_name):
+        start = (page - 1) * self.paginate_by
+        queryset = self.get_queryset().order_by("-pk")
+        rows = list(queryset[start : start + self.paginate_by + 1])
+        return {
+            "results": [
+                self.serialize_result(obj, to_field_name)
+                for obj in rows[: self.paginate_by]
+            ],
+            "pagination": {"more": len(rows) > self.paginate_by},
+        }
@@ -0,0 +1,34 @@
+import logging
+import time
+
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up_connections():
+    """
+    Open the persistent database connections of the current thread ahead of
+    the first request, e.g. at WSGI startup. Connections closed after every
+    request (CONN_MAX_AGE 0) are left alone. Returns the seconds it took
+    """
+    start = time.perf_counter()
+    for connection in connections.all():
+        if connection.settings_dict["CONN_MAX_AGE"] == 0:
+            continue
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            # The first request will retry and report the error
+            logger.exception("Could not warm up database %s", connection.alias)
+    return time.perf_counter() - start
+
+
+def connection_settings():
+    """How the default database connection is managed, for display"""
+    settings_dict = connections["default"].settings_dict
+    return {
+        "max_age": settings_dict["CONN_MAX_AGE"],
+        "health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+        "server_side_cursors": not settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"),
+    }
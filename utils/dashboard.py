@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_CACHE_KEY = "dashboard:metrics"
+DASHBOARD_HITS_KEY = "dashboard:hits"
+DASHBOARD_MISSES_KEY = "dashboard:misses"
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_dashboard_metrics(compute):
+    """
+    Return the cached dashboard metrics, calling compute() on a miss.
+    Entries live at most DASHBOARD_CACHE_TIMEOUT seconds, which bounds
+    staleness on processes that did not see the invalidation
+    """
+    metrics = cache.get(DASHBOARD_CACHE_KEY)
+    if metrics is None:
+        _count(DASHBOARD_MISSES_KEY)
+        metrics = compute()
+        cache.set(DASHBOARD_CACHE_KEY, metrics, settings.DASHBOARD_CACHE_TIMEOUT)
+    else:
+        _count(DASHBOARD_HITS_KEY)
+    return metrics
+
+
+def get_dashboard_cache_stats():
+    stats = cache.get_many([DASHBOARD_HITS_KEY, DASHBOARD_MISSES_KEY])
+    return {
+        "hits": stats.get(DASHBOARD_HITS_KEY, 0),
+        "misses": stats.get(DASHBOARD_MISSES_KEY, 0),
+    }
+
+
+def invalidate_dashboard():
+    """Drop the cached metrics once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(DASHBOARD_CACHE_KEY))
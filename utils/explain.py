@@ -0,0 +1,39 @@
+import re
+
+from django.utils.module_loading import autodiscover_modules
+
+# Report queries keyed by name, filled by the report_queries module of each app
+REPORT_QUERIES = {}
+
+SEQUENTIAL_SCAN_PATTERNS = (
+    # PostgreSQL
+    re.compile(r"Seq Scan on (\w+)"),
+    # SQLite, "SCAN t USING INDEX i" walks an index and is not flagged
+    re.compile(r"\bSCAN (?:TABLE )?(\w+)\b(?! USING)"),
+)
+
+
+def report_query(name):
+    """
+    Register a function returning the QuerySet behind a report, built with
+    representative arguments, so explain_report_queries can check its plan
+    """
+
+    def decorator(func):
+        REPORT_QUERIES[name] = func
+        return func
+
+    return decorator
+
+
+def get_report_queries():
+    autodiscover_modules("report_queries")
+    return dict(sorted(REPORT_QUERIES.items()))
+
+
+def find_sequential_scans(plan):
+    """Names of the tables read with a full sequential scan in an EXPLAIN output"""
+    tables = set()
+    for pattern in SEQUENTIAL_SCAN_PATTERNS:
+        tables.update(pattern.findall(plan))
+    return sorted(tables)
@@ -1,13 +1,241 @@
-from datetime import datetime
-from django.db import models
-from django.db.models import Manager, QuerySet
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Manager, QuerySet, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.lookups import IsNull
+from django.utils import timezone
+
+from utils.autocomplete import invalidate_autocomplete
+from utils.dashboard import invalidate_dashboard
+from utils.pagination import (
+    CURSOR_VAR,
+    KeysetChangeList,
+    KeysetInlineFormSet,
+    KeysetPaginator,
+)
 from django.contrib import admin
 from django_better_admin_arrayfield.admin.mixins import DynamicArrayMixin
 
 
-class AppManager(Manager):
+LIVE_ROWS = models.Q(deleted_at__isnull=True)
+
+
+class NullKey(Coalesce):
+    """
+    Unique constraint part for a nullable foreign key. PostgreSQL treats NULLs
+    as distinct, so the constraint would let rows with a NULL key repeat.
+    The output field is set on the class so the constraint deconstructs to
+    the same value every time and migrations do not see it change
+    """
+
+    output_field = models.BigIntegerField()
+
+    def __init__(self, field):
+        super().__init__(field, Value(0))
+
+
+class SoftDeleteQuerySet(QuerySet):
+    def live(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def deleted(self):
+        return self.filter(deleted_at__isnull=False)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_autocomplete(self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            invalidate_autocomplete(self.model)
+        return objs
+
+    def delete(self):
+        """Mark the rows as deleted, like the instance delete()"""
+        rows = self.live().update(deleted_at=timezone.now())
+        return rows, {self.model._meta.label: rows}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def restore(self):
+        """Bring soft-deleted rows back, use it from all_objects"""
+        return self.deleted().update(deleted_at=None)
+
+    restore.alters_data = True
+
+    def hard_delete(self):
+        """Remove the rows from the database for good"""
+        deleted = super().delete()
+        invalidate_autocomplete(self.model)
+        return deleted
+
+    hard_delete.alters_data = True
+    hard_delete.queryset_only = True
+
+
+class SoftDeleteManager(Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Manager of the live rows, soft-deleted ones are left out.
+    Models reach every row through their all_objects manager
+    """
+
     def get_queryset(self):
-        return QuerySet(self.model, using=self._db).exclude(is_deleted=True)
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class AccountedQuerySet(SoftDeleteQuerySet):
+    """
+    QuerySet of a money-moving model whose update(), delete(), restore() and
+    bulk_create() keep the capital ledger and the daily rollups in step
+    without going through every row's save(). Updates read the capital delta
+    and the rollup changes from one grouped query, however many rows match.
+    Subclasses name the fields behind the capital balance and build the
+    per-row contribution from a mapping of field attname to expression
+    """
+
+    capital_fields = ()
+    # capital_expression(columns), a staticmethod, and get_rollup(), which
+    # every concrete subclass defines. Intermediate classes opt out of the
+    # check with the abstract=True class keyword
+    capital_expression = None
+    get_rollup = None
+    required_attributes = ("capital_expression", "get_rollup")
+
+    # Set on the queryset _lock_rows() returns, so chained update()
+    # overrides lock the rows once
+    _rows_locked = False
+
+    def __init_subclass__(cls, abstract=False, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in cls.required_attributes if getattr(cls, name) is None]
+        if missing and not abstract:
+            raise TypeError(f"{cls.__name__} must define {', '.join(missing)}")
+
+    def _lock_rows(self):
+        """
+        Lock the matching rows and narrow the queryset to them, so the grouped
+        read an update is accounted from and the update itself see the same
+        rows, and no concurrent write changes them in between
+        """
+        pks = list(
+            self.order_by().select_for_update(of=("self",)).values_list("pk", flat=True)
+        )
+        locked = self.filter(pk__in=pks)
+        locked._rows_locked = True
+        return locked
+
+    def _accounted_fields(self):
+        rollup = self.get_rollup()
+        return {"created_at", "deleted_at", *self.capital_fields, *rollup.dimensions, *rollup.metrics}
+
+    def _update_columns(self, values):
+        """Map update() keyword arguments to attname -> new value expression"""
+        columns = {}
+        for name, value in values.items():
+            field = self.model._meta.get_field(name)
+            if isinstance(value, models.Model):
+                value = value.pk
+            if not hasattr(value, "resolve_expression"):
+                value = Value(value, output_field=field)
+            columns[field.attname] = value
+        return columns
+
+    def _live(self, column):
+        return Case(When(IsNull(column, True), then=Value(1)), default=Value(0))
+
+    def _accounting_groups(self, columns):
+        """
+        Group the matching rows by their rollup key before and after the
+        update, with the counts, metric totals and capital delta of each group
+        """
+        rollup = self.get_rollup()
+        names = {"created_at", "deleted_at", *self.capital_fields, *rollup.metrics}
+        old = {name: F(name) for name in names | set(rollup.dimensions)}
+        new = {**old, **columns}
+
+        keys = {"old_day": TruncDate(old["created_at"]), "new_day": TruncDate(new["created_at"])}
+        keys.update({"old_live": self._live(old["deleted_at"]), "new_live": self._live(new["deleted_at"])})
+        for index, name in enumerate(rollup.dimensions):
+            keys[f"old_dim_{index}"] = old[name]
+            keys[f"new_dim_{index}"] = new[name]
+
+        totals = {"rows": Count("pk")}
+        for index, name in enumerate(rollup.metrics):
+            totals[f"old_metric_{index}"] = Sum(old[name])
+            totals[f"new_metric_{index}"] = Sum(new[name])
+        totals["capital_delta"] = Sum(
+            keys["new_live"] * self.capital_expression(new)
+            - keys["old_live"] * self.capital_expression(old),
+            output_field=models.FloatField(),
+        )
+        return self.order_by().annotate(**keys).values(*keys).annotate(**totals)
+
+    def _record_groups(self, groups, reason):
+        from expenses.models import Capital
+
+        rollup = self.get_rollup()
+        changes = {}
+        capital_delta = 0
+        for group in groups:
+            capital_delta += group["capital_delta"] or 0
+            for state, sign in (("old", -1), ("new", 1)):
+                if not group[f"{state}_live"]:
+                    continue
+                key = (group[f"{state}_day"],) + tuple(
+                    group[f"{state}_dim_{index}"] for index in range(len(rollup.dimensions))
+                )
+                values = {
+                    metric: group[f"{state}_metric_{index}"]
+                    for index, metric in enumerate(rollup.metrics)
+                }
+                rollup.add_change(changes, key, sign, values, count=group["rows"])
+
+        Capital.adjust(capital_delta, source=self.model, reason=reason)
+        rollup.apply_changes(changes)
+        invalidate_dashboard()
+
+    def update(self, **kwargs):
+        columns = self._update_columns(kwargs)
+        if not columns.keys() & self._accounted_fields():
+            return super().update(**kwargs)
+
+        from expenses.models import CapitalEntryReason
+
+        if not self._rows_locked:
+            with transaction.atomic(using=self.db, savepoint=False):
+                return self._lock_rows().update(**kwargs)
+
+        reason = CapitalEntryReason.SAVE
+        if columns.keys() == {"deleted_at"} and kwargs["deleted_at"] is not None:
+            reason = CapitalEntryReason.DELETE
+        # No savepoint when a subclass update() already opened the transaction,
+        # a failure rolls all of it back anyway
+        with transaction.atomic(using=self.db, savepoint=False):
+            groups = list(self._accounting_groups(columns))
+            rows = super().update(**kwargs)
+            if groups:
+                self._record_groups(groups, reason)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from expenses.models import Capital
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            live = [obj for obj in objs if obj.deleted_at is None]
+            Capital.adjust(
+                sum(obj.capital_contribution() for obj in live), source=self.model
+            )
+            self.get_rollup().record_many((None, obj) for obj in live)
+            invalidate_dashboard()
+        return objs
 
 
 class BaseModel(models.Model):
@@ -18,27 +246,263 @@ class BaseModel(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    # Columns only ever written with F() increments, left out when an existing
+    # row is saved so a copy loaded before an increment cannot undo it
+    counter_fields = ()
+
+    # Field values as last loaded from or saved to the database, keyed by
+    # attname, so save hooks can diff against them without a query.
+    # Mutable values changed in place are not detected
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _remember_values(self, fields=None):
+        loaded = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (fields is None or field.attname in fields or field.name in fields)
+        }
+        if fields is None:
+            self._loaded_values = loaded
+        else:
+            self._loaded_values = {**getattr(self, "_loaded_values", {}), **loaded}
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
+    def save(self, *args, **kwargs):
+        kwargs.pop("from_delete", None)
+        if (
+            self.counter_fields
+            and not self._state.adding
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get("update_fields"))
+        invalidate_autocomplete(type(self))
+
+    def get_original(self):
+        """
+        Return a copy of the row as it was loaded, or None for new rows.
+        Instances that were built by hand or loaded with deferred fields
+        fall back to fetching the row
+        """
+        if self.pk is None:
+            return None
+        loaded = getattr(self, "_loaded_values", None)
+        fields = self._meta.concrete_fields
+        if loaded is None or len(loaded) < len(fields):
+            return type(self)._base_manager.filter(pk=self.pk).first()
+        return type(self).from_db(
+            self._state.db,
+            [field.attname for field in fields],
+            [loaded[field.attname] for field in fields],
+        )
+
     def delete(self):
         """Mark the record as deleted instead of deleting it"""
 
-        self.deleted_at = datetime.now()
+        self.deleted_at = timezone.now()
         self.save(from_delete=True)  # type: ignore
 
 
+class BaseRollup(models.Model):
+    """
+    Daily pre-aggregated totals of a source model, one row per day and
+    combination of dimensions. The source save/delete hooks call record()
+    so the rows stay current, rebuild() recomputes them from scratch.
+    Days are taken from the source created_at and soft-deleted rows are left out
+    """
+
+    class Meta:
+        abstract = True
+
+    day = models.DateField()
+    row_count = models.IntegerField(default=0)
+
+    source_model = None
+    # Source attribute names, FK dimensions use their attname (e.g. "customer_id")
+    dimensions = ()
+    metrics = ()
+
+    @classmethod
+    def _contribution(cls, obj):
+        if obj is None or obj.deleted_at is not None:
+            return None
+        key = (obj.created_at.date(),) + tuple(getattr(obj, d) for d in cls.dimensions)
+        values = {m: getattr(obj, m) or 0 for m in cls.metrics}
+        return key, values
+
+    @classmethod
+    def record(cls, old, new):
+        """
+        Move a source row's contribution from its old state to its new one,
+        either may be None when the row is being created or deleted
+        """
+        cls.record_many([(old, new)])
+
+    @classmethod
+    def record_many(cls, pairs):
+        """record() for many (old, new) pairs, writing each touched rollup row once"""
+        changes = {}
+        for old, new in pairs:
+            for obj, sign in ((old, -1), (new, 1)):
+                contribution = cls._contribution(obj)
+                if contribution is not None:
+                    key, values = contribution
+                    cls.add_change(changes, key, sign, values)
+        cls.apply_changes(changes)
+
+    @classmethod
+    def add_change(cls, changes, key, sign, values, count=1):
+        """Accumulate `count` source rows totalling `values` into changes[key]"""
+        current, totals = changes.get(key, (0, dict.fromkeys(cls.metrics, 0)))
+        for metric, value in values.items():
+            totals[metric] += sign * (value or 0)
+        changes[key] = (current + sign * count, totals)
+
+    @classmethod
+    def apply_changes(cls, changes):
+        for key, (count, totals) in changes.items():
+            if count == 0 and not any(totals.values()):
+                continue
+            lookup = dict(zip(("day",) + tuple(cls.dimensions), key))
+            with transaction.atomic():
+                rollup, _ = cls.objects.get_or_create(**lookup)
+                cls.objects.filter(pk=rollup.pk).update(
+                    row_count=F("row_count") + count,
+                    **{metric: F(metric) + value for metric, value in totals.items()},
+                )
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every rollup row from the source table"""
+        rows = (
+            cls.source_model.objects.filter(deleted_at__isnull=True)
+            .annotate(day=TruncDate("created_at"))
+            .values("day", *cls.dimensions)
+            .annotate(
+                row_count=Count("pk"),
+                **{
+                    metric: Coalesce(
+                        Sum(metric), 0, output_field=cls._meta.get_field(metric).__class__()
+                    )
+                    for metric in cls.metrics
+                },
+            )
+            .order_by()
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                (cls(**row) for row in rows.iterator()), batch_size=1000
+            )
+        return cls.objects.count()
+
+
 class BaseAdminModel(admin.ModelAdmin, DynamicArrayMixin):
     readonly_fields = ("created_at", "updated_at")
     list_per_page = 25
 
+    # Related data needed by list_display columns, keyed by column name.
+    # Only the columns shown to the current user are joined or annotated,
+    # so the changelist runs a fixed number of queries whatever the page size
+    list_column_select_related = {}
+    list_column_prefetch_related = {}
+    list_column_annotations = {}
+
+    # Page the changelist by cursor instead of OFFSET, see utils.pagination
+    keyset_pagination = False
+
+    def get_changelist(self, request, **kwargs):
+        if self.keyset_pagination:
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(
+        self, request, queryset, per_page, orphans=0, allow_empty_first_page=True
+    ):
+        if not self.keyset_pagination:
+            return super().get_paginator(
+                request, queryset, per_page, orphans, allow_empty_first_page
+            )
+        return KeysetPaginator(
+            queryset,
+            per_page,
+            cursor=request.GET.get(CURSOR_VAR),
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
+
+    def _list_column_values(self, request, declarations):
+        for column in self.get_list_display(request):
+            yield from declarations.get(column, ())
+
+    def get_list_select_related(self, request):
+        related = list(
+            self._list_column_values(request, self.list_column_select_related)
+        )
+        if not related:
+            return super().get_list_select_related(request)
+        if isinstance(self.list_select_related, (list, tuple)):
+            related = list(self.list_select_related) + related
+        return tuple(dict.fromkeys(related))
+
+    def _is_changelist(self, request):
+        match = getattr(request, "resolver_match", None)
+        return bool(match and match.url_name and match.url_name.endswith("_changelist"))
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # The change form, delete view and autocomplete share this queryset,
+        # they have no list columns to fill
+        if not self._is_changelist(request):
+            return qs
+        prefetches = list(
+            self._list_column_values(request, self.list_column_prefetch_related)
+        )
+        if prefetches:
+            qs = qs.prefetch_related(*dict.fromkeys(prefetches))
+        annotations = {}
+        for column in self.get_list_display(request):
+            annotations.update(self.list_column_annotations.get(column, {}))
+        if annotations:
+            qs = qs.annotate(**annotations)
+        return qs
+
     # def get_queryset(self, request):
     #     qs = super().get_queryset(request)
     #     return qs.exclude(deleted_at=None)
 
 
-class BaseAdminInline(admin.StackedInline):
-    readonly_fields = ("created_at", "updated_at")
+class PagedAdminInline(admin.TabularInline):
+    """
+    Inline editing the related rows a keyset page at a time, see
+    KeysetInlineFormSet, with links to the neighbouring pages under it
+    """
+
+    formset = KeysetInlineFormSet
+    template = "admin/edit_inline/keyset_tabular.html"
     classes = ["collapse"]
-    per_page = 5
+    extra = 0
+    per_page = 20
 
-    # def get_queryset(self, request):
-    #     qs = super().get_queryset(request)
-    #     return qs.exclude(deleted_at=None)
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.params = request.GET.copy()
+        return formset
@@ -0,0 +1,237 @@
+import base64
+import binascii
+import json
+from functools import cached_property
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.forms.models import BaseInlineFormSet
+
+CURSOR_VAR = "cursor"
+
+# Below this many estimated rows the exact count is cheap enough to run,
+# and planner estimates of small results are the least reliable
+EXACT_COUNT_BELOW = 10_000
+
+
+def estimate_count(queryset):
+    """
+    Row count of a queryset as estimated by the PostgreSQL planner, which
+    costs no more than planning the query. Other databases and small
+    estimates are counted exactly
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.count()
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate < EXACT_COUNT_BELOW:
+        return queryset.count()
+    return estimate
+
+
+class KeysetPage(Page):
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, 1, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<Keyset page of {len(self.object_list)} objects>"
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator that walks the queryset by its ordering key instead of OFFSET,
+    so every page costs the same however deep it is. Pages are addressed by
+    the opaque cursor of a neighbouring page rather than by number.
+
+    The queryset ordering must be made of non-null fields of the model and end
+    with a unique one, e.g. ("-created_at", "-id"). Other orderings fall back
+    to numbered pages. count is the planner's estimate unless given
+    """
+
+    def __init__(self, object_list, per_page, cursor=None, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cursor = cursor
+        self.keys = self._ordering_keys()
+        self.current_page = None
+        if count is not None:
+            self.count = count
+
+    @property
+    def uses_keyset(self):
+        return self.keys is not None
+
+    @cached_property
+    def count(self):
+        if not self.uses_keyset:
+            return super().count
+        return estimate_count(self.object_list)
+
+    def _ordering_keys(self):
+        """(field, descending) pairs of the ordering, None if it cannot be used"""
+        opts = self.object_list.model._meta
+        ordering = self.object_list.query.order_by or opts.ordering
+        keys = []
+        for item in ordering:
+            if not isinstance(item, str) or "__" in item or item == "?":
+                return None
+            name = item.lstrip("-")
+            try:
+                field = opts.pk if name == "pk" else opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.null:
+                return None
+            keys.append((field, item.startswith("-")))
+        if not keys or not (keys[-1][0].primary_key or keys[-1][0].unique):
+            return None
+        return keys
+
+    def _encode(self, obj, direction):
+        values = [getattr(obj, field.attname) for field, _ in self.keys]
+        # str() rather than DjangoJSONEncoder, which drops microseconds
+        data = json.dumps([direction, values], default=str)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ("next", "previous") or len(values) != len(self.keys):
+                return None
+            return direction, [
+                field.to_python(value) for (field, _), value in zip(self.keys, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            return None
+
+    def _beyond(self, values, forward):
+        """Rows ordered after the key values, or before them when not forward"""
+        condition = Q()
+        for index, (field, descending) in enumerate(self.keys):
+            lookup = "lt" if descending == forward else "gt"
+            step = Q(**{f"{field.attname}__{lookup}": values[index]})
+            for previous in range(index):
+                step &= Q(**{self.keys[previous][0].attname: values[previous]})
+            condition |= step
+        # The leading key as a range too, so the index range scan is bounded
+        field, descending = self.keys[0]
+        lookup = "lte" if descending == forward else "gte"
+        return Q(**{f"{field.attname}__{lookup}": values[0]}) & condition
+
+    def page(self, number=1):
+        if not self.uses_keyset:
+            return super().page(number)
+
+        decoded = self._decode(self.cursor) if self.cursor else None
+        queryset = self.object_list
+        if decoded is None:
+            direction = "next"
+        else:
+            direction, values = decoded
+            queryset = queryset.filter(self._beyond(values, direction == "next"))
+        if direction == "previous":
+            queryset = queryset.reverse()
+
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if direction == "previous":
+            rows.reverse()
+
+        if direction == "next":
+            more_after, more_before = has_more, decoded is not None
+        else:
+            more_after, more_before = True, has_more
+        next_cursor = previous_cursor = None
+        if rows:
+            if more_after:
+                next_cursor = self._encode(rows[-1], "next")
+            if more_before:
+                previous_cursor = self._encode(rows[0], "previous")
+        self.current_page = KeysetPage(rows, self, next_cursor, previous_cursor)
+        return self.current_page
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that leaves the cursor parameter to the paginator"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Like the page number, so filtering, sorting or searching starts
+        # again from the first page
+        self.params.pop(CURSOR_VAR, None)
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def _page_query(self, cursor):
+        return self.get_query_string({CURSOR_VAR: cursor})
+
+    def previous_page_query(self):
+        page = getattr(self.paginator, "current_page", None)
+        if page is None or not page.has_previous():
+            return None
+        return self._page_query(page.previous_cursor)
+
+    def next_page_query(self):
+        page = getattr(self.paginator, "current_page", None)
+        if page is None or not page.has_next():
+            return None
+        return self._page_query(page.next_cursor)
+
+
+class KeysetInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset over one keyset page of the related rows, so forms are
+    only built for the rows on that page. The page cursor is read from the
+    "<prefix>-cursor" parameter of the change form URL, which the form posts
+    back to, so a save sees the rows it was rendered with
+    """
+
+    ordering = ("-created_at", "-id")
+    per_page = 20
+    # Query parameters of the change form request, set by the inline
+    params = None
+
+    @property
+    def cursor_var(self):
+        return f"{self.prefix}-{CURSOR_VAR}"
+
+    def get_queryset(self):
+        if not hasattr(self, "page"):
+            queryset = super().get_queryset().order_by(*self.ordering)
+            cursor = self.params.get(self.cursor_var) if self.params else None
+            paginator = KeysetPaginator(queryset, self.per_page, cursor=cursor, count=0)
+            self.page = paginator.page()
+            self._queryset = self.page.object_list
+        return self._queryset
+
+    def _page_query(self, cursor):
+        params = self.params.copy()
+        params[self.cursor_var] = cursor
+        return f"?{params.urlencode()}"
+
+    def previous_page_query(self):
+        self.get_queryset()
+        if not self.page.has_previous():
+            return None
+        return self._page_query(self.page.previous_cursor)
+
+    def next_page_query(self):
+        self.get_queryset()
+        if not self.page.has_next():
+            return None
+        return self._page_query(self.page.next_cursor)
@@ -0,0 +1,24 @@
+import time
+
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend that counts the connections it opens and the time spent
+    opening them, so request profiles can tell connection setup apart from
+    query time
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_count = 0
+        self.connect_time = 0.0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            self.connect_time += time.perf_counter() - start
+            self.connect_count += 1
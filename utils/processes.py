@@ -0,0 +1,25 @@
+import os
+
+import django
+from django.db import connections
+
+
+def setup_django(settings_module):
+    """
+    Process pool initializer that sets Django up in a freshly started worker.
+    Lives apart from any models module, as the worker imports the
+    initializer before it runs it
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+def close_idle_connections():
+    """
+    Close this process's database connections before a process pool starts,
+    except those inside a transaction, which closing would roll back under
+    the caller. Workers never use them either way, they open their own
+    """
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close()
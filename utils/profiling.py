@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+HISTOGRAM_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, None)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting the queries run through it and the
+    time spent in them. Statements are grouped by their SQL so repeated
+    lookups (N+1 patterns) and exact duplicates can be told apart
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+            if not many:
+                self.executions[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self):
+        """Queries that ran again with exactly the same SQL and parameters"""
+        return sum(count - 1 for count in self.executions.values())
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+class Profile:
+    def __init__(self, name=None):
+        self.name = name
+        self.queries = QueryRecorder()
+        self.total_time = 0.0
+        # Connections opened, and the time spent opening them, on backends
+        # that record it (see utils.postgresql)
+        self.connects = 0
+        self.connect_time = 0.0
+
+    @property
+    def db_time(self):
+        return self.queries.db_time
+
+    @property
+    def python_time(self):
+        return max(self.total_time - self.db_time - self.connect_time, 0.0)
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "queries": self.queries.count,
+            "duplicates": self.queries.duplicates,
+            "total_ms": self.total_time * 1000,
+            "db_ms": self.db_time * 1000,
+            "connects": self.connects,
+            "connect_ms": self.connect_time * 1000,
+            "python_ms": self.python_time * 1000,
+        }
+
+
+@contextmanager
+def profile_block(name=None):
+    """
+    Record the queries, database time and Python time of the enclosed block
+    on every configured database connection of the current thread
+    """
+    profile = Profile(name)
+    opened = {
+        connection: (
+            getattr(connection, "connect_count", 0),
+            getattr(connection, "connect_time", 0.0),
+        )
+        for connection in connections.all()
+    }
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in opened:
+            stack.enter_context(connection.execute_wrapper(profile.queries))
+        try:
+            yield profile
+        finally:
+            profile.total_time = time.perf_counter() - start
+            for connection, (count, seconds) in opened.items():
+                profile.connects += getattr(connection, "connect_count", 0) - count
+                profile.connect_time += getattr(connection, "connect_time", 0.0) - seconds
+
+
+class ProfileHistory:
+    """In-process rolling window of the last samples per URL name"""
+
+    def __init__(self, window):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._samples[profile.name].append(profile.as_dict())
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            samples = {name: list(rows) for name, rows in self._samples.items()}
+
+        summary = []
+        for name, rows in sorted(samples.items()):
+            latencies = sorted(row["total_ms"] for row in rows)
+            count = len(rows)
+            summary.append(
+                {
+                    "name": name,
+                    "count": count,
+                    "p50_ms": _percentile(latencies, 50),
+                    "p95_ms": _percentile(latencies, 95),
+                    "max_ms": latencies[-1],
+                    "avg_db_ms": sum(row["db_ms"] for row in rows) / count,
+                    "avg_connect_ms": sum(row["connect_ms"] for row in rows) / count,
+                    "connects": sum(row["connects"] for row in rows),
+                    "avg_python_ms": sum(row["python_ms"] for row in rows) / count,
+                    "avg_queries": sum(row["queries"] for row in rows) / count,
+                    "max_queries": max(row["queries"] for row in rows),
+                    "duplicates": sum(row["duplicates"] for row in rows),
+                    "histogram": _histogram(latencies),
+                }
+            )
+        return summary
+
+
+def _percentile(values, percent):
+    index = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def _histogram(latencies):
+    counts = []
+    remaining = iter(latencies)
+    value = next(remaining, None)
+    for bound in HISTOGRAM_BUCKETS:
+        count = 0
+        while value is not None and (bound is None or value <= bound):
+            count += 1
+            value = next(remaining, None)
+        label = f"≤ {bound} ms" if bound is not None else f"> {HISTOGRAM_BUCKETS[-2]} ms"
+        counts.append((label, count))
+    return counts
+
+
+history = ProfileHistory(settings.REQUEST_PROFILE_WINDOW)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile every request that resolves to a named URL, keep the samples in
+    the rolling history and log the ones slower than SLOW_REQUEST_MS.
+    Streaming responses are measured up to the point their body starts
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with profile_block() as profile:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        if match is None or not match.url_name:
+            return response
+
+        profile.name = match.url_name
+        history.add(profile)
+
+        if profile.total_time * 1000 >= settings.SLOW_REQUEST_MS:
+            statement, repeats = profile.queries.most_repeated()
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, %d queries (%d duplicates) "
+                "taking %.0f ms, %.0f ms connecting, %.0f ms in Python. "
+                "Most repeated query ran %d times: %s",
+                request.method,
+                request.path,
+                profile.name,
+                profile.total_time * 1000,
+                profile.queries.count,
+                profile.queries.duplicates,
+                profile.db_time * 1000,
+                profile.connect_time * 1000,
+                profile.python_time * 1000,
+                repeats,
+                statement,
+            )
+        return response
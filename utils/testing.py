@@ -0,0 +1,44 @@
+"""Builders of the rows most tests start from"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from customers.models import Customer
+from orders.models import Order, OrderBasket
+from providers.models import ShippingProvider
+
+
+def create_shipping_provider(name="Shipping"):
+    return ShippingProvider.objects.create(
+        name=name, phone_number="1", price_per_kg=1, address="-"
+    )
+
+
+def create_basket(shipping_provider=None, **fields):
+    return OrderBasket.objects.create(
+        **{"total_price": 10, "number_of_items": 1, **fields},
+        shipping_provider=shipping_provider or create_shipping_provider(),
+    )
+
+
+def create_customer(full_name="Customer", **fields):
+    return Customer.objects.create(full_name=full_name, notes=[], **fields)
+
+
+def create_orders(count, customer, order_basket, **fields):
+    return Order.objects.bulk_create(
+        Order(
+            **{"total_price": 10, "number_of_items": 1, **fields},
+            customer=customer,
+            order_basket=order_basket,
+        )
+        for _ in range(count)
+    )
+
+
+class AdminTestCase(TestCase):
+    """Runs each test logged in as a superuser"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.user)